@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 try:
@@ -14,13 +14,33 @@ import uvicorn
 import os
 import asyncio
 from riot_api import riot_api, RiotAPIService
+from services.riot_cache import riot_cache
+from services.riot_http import riot_http
+from services.profile_refresher import ProfileRefresher
+from services.riot_id import is_valid_riot_id
+from services.champion_index import champion_index
+from services.riot_metrics import use_feature
 from routers import riot_balance, riot_account_proxy
 
 app = FastAPI(title="LoL Custom Match Tool API", version="1.0.0")
 
-# 라이엇 API 서비스 인스턴스
+# 라이엇 API 서비스 인스턴스 (riot_api와 같은 커넥션 풀 공유)
 riot_service = RiotAPIService()
 
+@app.on_event("startup")
+async def startup_riot_http():
+    # 라이엇 호스트별 커넥션 풀 생성 (TCP/TLS 핸드셰이크 재사용)
+    await riot_api.startup()
+    # 챔피언 인덱스(Data Dragon 스냅샷)는 시작할 때 한 번만 읽음
+    champion_index.load()
+    # 최근 참가자 라이엇 프로필 백그라운드 갱신 시작
+    profile_refresher.start()
+
+@app.on_event("shutdown")
+async def shutdown_riot_http():
+    await profile_refresher.stop()
+    await riot_api.shutdown()
+
 # WebSocket 연결 관리
 class ConnectionManager:
     def __init__(self):
@@ -119,10 +139,17 @@ def init_db():
                 mainLane TEXT,
                 preferredLanes TEXT,
                 mmr INTEGER,
+                puuid TEXT,
                 createdAt DATETIME DEFAULT CURRENT_TIMESTAMP
             )
         """)
         
+        # 기존 DB에 puuid 컬럼 추가 (라이엇 데이터는 PUUID 기준으로 연결)
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(players)")]
+        if 'puuid' not in columns:
+            cursor.execute("ALTER TABLE players ADD COLUMN puuid TEXT")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_players_puuid ON players (puuid)")
+        
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS matches (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -155,6 +182,10 @@ def init_db():
 # 데이터베이스 즉시 초기화
 init_db()
 
+# 라이엇 프로필 캐시 (조회는 저장본 즉시 반환, 오래된 경우 백그라운드 갱신)
+profile_refresher = ProfileRefresher(DB_PATH, riot_api.get_player_full_info)
+profile_refresher.init_db()
+
 # 헬스체크 엔드포인트
 @app.get("/")
 async def root():
@@ -628,10 +659,14 @@ async def delete_match(match_id: int):
 # ===== 라이엇 API 엔드포인트 =====
 
 @app.get("/api/riot/player/{game_name}/{tag_line}")
-async def get_player_info(game_name: str, tag_line: str):
-    """라이엇 ID로 플레이어 정보 조회"""
+async def get_player_info(game_name: str, tag_line: str, include_summoner: bool = False):
+    """라이엇 ID로 플레이어 정보 조회 (소환사 레벨/아이콘은 include_summoner=true일 때만 추가 조회)"""
     try:
-        player_info = await riot_api.get_player_full_info(game_name, tag_line)
+        with use_feature("player-lookup"):
+            if include_summoner:
+                player_info = await riot_api.get_player_full_info(game_name, tag_line, include_summoner=True)
+            else:
+                player_info = await profile_refresher.get(f"{game_name}#{tag_line}")
         if not player_info:
             raise HTTPException(status_code=404, detail="플레이어를 찾을 수 없습니다.")
         return player_info
@@ -642,7 +677,8 @@ async def get_player_info(game_name: str, tag_line: str):
 async def get_player_league(game_name: str, tag_line: str):
     """플레이어의 리그 정보 조회"""
     try:
-        player_info = await riot_api.get_player_full_info(game_name, tag_line)
+        with use_feature("player-lookup"):
+            player_info = await profile_refresher.get(f"{game_name}#{tag_line}")
         if not player_info:
             raise HTTPException(status_code=404, detail="플레이어를 찾을 수 없습니다.")
         return {"league": player_info.get("league")}
@@ -653,23 +689,103 @@ async def get_player_league(game_name: str, tag_line: str):
 async def get_player_champions(game_name: str, tag_line: str):
     """플레이어의 챔피언 마스터리 조회"""
     try:
-        player_info = await riot_api.get_player_full_info(game_name, tag_line)
+        with use_feature("player-lookup"):
+            player_info = await profile_refresher.get(f"{game_name}#{tag_line}")
         if not player_info:
             raise HTTPException(status_code=404, detail="플레이어를 찾을 수 없습니다.")
         return {"champion_masteries": player_info.get("champion_masteries", [])}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+class RiotIdIn(BaseModel):
+    gameName: str
+    tagLine: str
+
+class PlayerBatchRequest(BaseModel):
+    players: List[RiotIdIn]
+
+# 한 번에 조회할 수 있는 최대 인원
+PLAYER_BATCH_MAX = 40
+
+@app.post("/api/riot/players/batch")
+async def get_players_batch(request: PlayerBatchRequest):
+    """여러 라이엇 ID를 서버에서 동시에 조회하고, 준비된 순서대로 NDJSON으로 스트리밍"""
+    if len(request.players) > PLAYER_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {PLAYER_BATCH_MAX}명까지 조회할 수 있습니다.")
+
+    async def lookup(index: int, player: RiotIdIn) -> dict:
+        result = {"index": index, "gameName": player.gameName, "tagLine": player.tagLine}
+        if not is_valid_riot_id(player.gameName, player.tagLine):
+            result.update(success=False, message="라이엇 ID 형식이 올바르지 않습니다.")
+            return result
+        try:
+            with use_feature("player-lookup"):
+                player_info = await riot_api.get_player_full_info(player.gameName, player.tagLine)
+            if player_info:
+                result.update(success=True, data=player_info)
+            else:
+                result.update(success=False, message="플레이어를 찾을 수 없습니다.")
+        except Exception as e:
+            result.update(success=False, message=str(e))
+        return result
+
+    async def stream():
+        tasks = [asyncio.ensure_future(lookup(i, p)) for i, p in enumerate(request.players)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield json.dumps(await next_done, ensure_ascii=False) + "\n"
+        finally:
+            # 클라이언트가 중간에 끊으면 남은 조회 취소
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+# 챔피언 데이터는 패치 버전별로 고정이므로 브라우저/CDN이 오래 캐시해도 됨
+CHAMPION_CACHE_CONTROL = "public, max-age=86400"
+
 @app.get("/api/riot/champion/{champion_id}")
-async def get_champion_info(champion_id: int):
-    """챔피언 정보 조회"""
+async def get_champion_info(champion_id: int, response: Response):
+    """챔피언 정보 조회 (로컬 인덱스에서 바로 읽음)"""
+    champion_info = champion_index.to_dict(champion_id)
+    if not champion_info:
+        raise HTTPException(status_code=404, detail="챔피언을 찾을 수 없습니다.")
+    response.headers["Cache-Control"] = CHAMPION_CACHE_CONTROL
+    response.headers["ETag"] = f'"{champion_index.version}-{champion_id}"'
+    return champion_info
+
+@app.get("/api/riot/champions")
+async def get_champions(response: Response, ids: Optional[str] = None):
+    """챔피언 목록 한 번에 조회 (ids=1,2,3 으로 일부만)"""
     try:
-        champion_info = await riot_api.get_champion_data(champion_id)
-        if not champion_info:
-            raise HTTPException(status_code=404, detail="챔피언을 찾을 수 없습니다.")
-        return champion_info
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        champion_ids = [int(i) for i in ids.split(",") if i.strip()] if ids else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids는 쉼표로 구분한 챔피언 ID여야 합니다.")
+    response.headers["Cache-Control"] = CHAMPION_CACHE_CONTROL
+    if champion_ids is None:
+        response.headers["ETag"] = f'"{champion_index.version}"'
+    return {"version": champion_index.version, "champions": champion_index.all(champion_ids)}
+
+@app.get("/api/riot/cache/stats")
+async def get_riot_cache_stats():
+    """라이엇 응답 캐시 적중/미스 통계"""
+    return riot_cache.stats()
+
+@app.get("/api/metrics/riot")
+async def get_riot_metrics():
+    """라이엇 호출 지표 (라우트별 상태/캐시/재시도/최근 지연 분포, 남은 한도, 기능별 사용량)"""
+    return riot_http.metrics.snapshot(riot_http.limiter.budget())
+
+@app.get("/api/metrics/riot/prometheus")
+async def get_riot_metrics_prometheus():
+    """같은 지표의 Prometheus 텍스트 형식"""
+    return Response(riot_http.metrics.prometheus(riot_http.limiter.budget()),
+                    media_type="text/plain; version=0.0.4")
+
+@app.get("/api/riot/stats")
+async def get_riot_stats():
+    """라이엇 호출 통계 (캐시, 중복 요청 합치기, 남은 레이트 리밋)"""
+    return dict(riot_http.stats(), profiles=profile_refresher.stats())
 
 # ===== WebSocket 실시간 통신 =====
 
@@ -4,149 +4,218 @@ import asyncio
 from typing import Dict, List, Optional, Any
 import os
 from datetime import datetime, timedelta
+from services.riot_http import RiotHttpClient, riot_http, riot_base_url
+from services.player_lookup import build_player_lookup
+from services.riot_id import is_valid_riot_id
+from services.champion_index import champion_index
+
+def solo_league_entries(data: List[Dict]) -> List[Dict]:
+    """리그 응답에서 솔로랭크만 남기고 상세 정보 추가"""
+    # 솔로랭크만 필터링하고 상세 정보 포함
+    solo_entries = [entry for entry in data if entry.get('queueType') == 'RANKED_SOLO_5x5']
+    
+    # 각 엔트리에 추가 정보 계산
+    for entry in solo_entries:
+        # 승률 계산
+        total_games = entry.get('wins', 0) + entry.get('losses', 0)
+        entry['winRate'] = round((entry.get('wins', 0) / total_games * 100), 1) if total_games > 0 else 0
+        
+        # 티어+랭크 조합 문자열
+        entry['tierRank'] = f"{entry.get('tier', 'UNRANKED')} {entry.get('rank', '')}"
+        
+        # 활성 상태 확인
+        entry['isActive'] = not entry.get('inactive', True)
+        
+    return solo_entries
+
+def with_champion_names(masteries: List[Dict]) -> List[Dict]:
+    """숙련도 항목에 로컬 챔피언 인덱스의 영문/한글 이름 추가"""
+    named = []
+    for mastery in masteries:
+        champion = champion_index.get(mastery.get('championId'))
+        named.append(dict(mastery, championName=champion.name if champion else None,
+                          championKoName=champion.ko_name if champion else None))
+    return named
 
 class RiotAPIService:
-    def __init__(self):
+    def __init__(self, http: Optional[RiotHttpClient] = None):
         self.api_key = os.getenv('RIOT_API_KEY', '')
         self.base_urls = {
-            'asia': 'https://asia.api.riotgames.com',
-            'kr': 'https://kr.api.riotgames.com'
+            'asia': riot_base_url('https://asia.api.riotgames.com'),
+            'kr': riot_base_url('https://kr.api.riotgames.com')
         }
         self.rate_limits = {
             'personal': {'limit': 100, 'window': 120},  # 2분당 100개
             'app': {'limit': 20000, 'window': 600}      # 10분당 20,000개
         }
+        # 호스트별로 재사용되는 커넥션 풀 (레이트 리미터 포함)
+        self.http = http or riot_http
+        # 기본 앱 한도(20/1초 등)는 그대로 두고 없는 창만 추가
+        self.http.limiter.seed_app_limits((v['limit'], v['window']) for v in self.rate_limits.values())
+
+    async def startup(self):
+        """FastAPI 시작 훅에서 호출: asia/kr 세션을 미리 연결"""
+        await self.http.start(self.base_urls.values())
+
+    async def shutdown(self):
+        """FastAPI 종료 훅에서 호출: 세션 정리"""
+        await self.http.close()
         
     async def get_summoner_by_riot_id(self, game_name: str, tag_line: str) -> Optional[Dict]:
         """라이엇 ID로 소환사 정보 조회"""
         if not self.api_key:
             raise ValueError("RIOT_API_KEY가 설정되지 않았습니다.")
+        if not is_valid_riot_id(game_name, tag_line):
+            return None  # 형식이 틀린 Riot ID는 API를 부르지 않음
             
         url = f"{self.base_urls['asia']}/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
         headers = {'X-Riot-Token': self.api_key}
         
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    elif response.status == 404:
-                        return None
-                    else:
-                        raise Exception(f"API 호출 실패: {response.status}")
-            except Exception as e:
-                print(f"소환사 정보 조회 실패: {e}")
+        try:
+            response = await self.http.get_json(url, 'account-v1.by-riot-id', headers, cache_kind='account')
+            if response.status == 200:
+                return response.data
+            elif response.status == 404:
                 return None
+            else:
+                raise Exception(f"API 호출 실패: {response.status}")
+        except Exception as e:
+            print(f"소환사 정보 조회 실패: {e}")
+            return None
     
     async def get_summoner_by_puuid(self, puuid: str) -> Optional[Dict]:
         """PUUID로 소환사 상세 정보 조회"""
         url = f"{self.base_urls['kr']}/lol/summoner/v4/summoners/by-puuid/{puuid}"
         headers = {'X-Riot-Token': self.api_key}
         
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        raise Exception(f"소환사 상세 정보 조회 실패: {response.status}")
-            except Exception as e:
-                print(f"소환사 상세 정보 조회 실패: {e}")
-                return None
+        try:
+            response = await self.http.get_json(url, 'summoner-v4.by-puuid', headers, cache_kind='summoner')
+            if response.status == 200:
+                return response.data
+            else:
+                raise Exception(f"소환사 상세 정보 조회 실패: {response.status}")
+        except Exception as e:
+            print(f"소환사 상세 정보 조회 실패: {e}")
+            return None
     
     async def get_league_entries(self, summoner_id: str) -> List[Dict]:
         """소환사 리그 정보 조회 (솔로랭크만)"""
         url = f"{self.base_urls['kr']}/lol/league/v4/entries/by-summoner/{summoner_id}"
         headers = {'X-Riot-Token': self.api_key}
         
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        # 솔로랭크만 필터링하고 상세 정보 포함
-                        solo_entries = [entry for entry in data if entry.get('queueType') == 'RANKED_SOLO_5x5']
-                        
-                        # 각 엔트리에 추가 정보 계산
-                        for entry in solo_entries:
-                            # 승률 계산
-                            total_games = entry.get('wins', 0) + entry.get('losses', 0)
-                            entry['winRate'] = round((entry.get('wins', 0) / total_games * 100), 1) if total_games > 0 else 0
-                            
-                            # 티어+랭크 조합 문자열
-                            entry['tierRank'] = f"{entry.get('tier', 'UNRANKED')} {entry.get('rank', '')}"
-                            
-                            # 활성 상태 확인
-                            entry['isActive'] = not entry.get('inactive', True)
-                            
-                        return solo_entries
-                    else:
-                        return []
-            except Exception as e:
-                print(f"리그 정보 조회 실패: {e}")
+        try:
+            response = await self.http.get_json(url, 'league-v4.entries-by-summoner', headers, cache_kind='league')
+            if response.status == 200:
+                return solo_league_entries(response.data)
+            else:
+                return []
+        except Exception as e:
+            print(f"리그 정보 조회 실패: {e}")
+            return []
+    
+    async def get_league_entries_by_puuid(self, puuid: str) -> List[Dict]:
+        """PUUID로 리그 정보 조회 (솔로랭크만, 소환사 ID 조회 불필요)"""
+        url = f"{self.base_urls['kr']}/lol/league/v4/entries/by-puuid/{puuid}"
+        headers = {'X-Riot-Token': self.api_key}
+        
+        try:
+            response = await self.http.get_json(url, 'league-v4.entries-by-puuid', headers, cache_kind='league')
+            if response.status == 200:
+                return solo_league_entries(response.data)
+            else:
                 return []
+        except Exception as e:
+            print(f"리그 정보 조회 실패: {e}")
+            return []
     
     async def get_champion_mastery(self, summoner_id: str, count: int = 10) -> List[Dict]:
         """챔피언 마스터리 정보 조회"""
         url = f"{self.base_urls['kr']}/lol/champion-mastery/v4/champion-masteries/by-summoner/{summoner_id}"
         headers = {'X-Riot-Token': self.api_key}
         
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data[:count]  # 상위 N개만 반환
-                    else:
-                        return []
-            except Exception as e:
-                print(f"챔피언 마스터리 조회 실패: {e}")
+        try:
+            response = await self.http.get_json(url, 'champion-mastery-v4.by-summoner', headers, cache_kind='mastery')
+            if response.status == 200:
+                return with_champion_names(response.data[:count])  # 상위 N개만 반환
+            else:
+                return []
+        except Exception as e:
+            print(f"챔피언 마스터리 조회 실패: {e}")
+            return []
+    
+    async def get_champion_mastery_by_puuid(self, puuid: str, count: int = 10) -> List[Dict]:
+        """PUUID로 챔피언 마스터리 정보 조회"""
+        url = f"{self.base_urls['kr']}/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}"
+        headers = {'X-Riot-Token': self.api_key}
+        
+        try:
+            response = await self.http.get_json(url, 'champion-mastery-v4.by-puuid', headers, cache_kind='mastery')
+            if response.status == 200:
+                return with_champion_names(response.data[:count])  # 상위 N개만 반환
+            else:
+                return []
+        except Exception as e:
+            print(f"챔피언 마스터리 조회 실패: {e}")
+            return []
+    
+    async def get_recent_match_ids(self, puuid: str, count: int = 10) -> List[str]:
+        """최근 매치 ID 목록 조회"""
+        url = f"{self.base_urls['asia']}/lol/match/v5/matches/by-puuid/{puuid}/ids"
+        headers = {'X-Riot-Token': self.api_key}
+        
+        try:
+            response = await self.http.get_json(url, 'match-v5.ids-by-puuid', headers, params={'start': 0, 'count': count})
+            if response.status == 200:
+                return response.data
+            else:
                 return []
+        except Exception as e:
+            print(f"최근 매치 조회 실패: {e}")
+            return []
     
     async def get_champion_data(self, champion_id: int) -> Optional[Dict]:
-        """챔피언 데이터 조회 (정적 데이터)"""
-        # 실제로는 챔피언 데이터를 미리 저장해두고 사용
-        # 여기서는 간단한 예시만 제공
-        champion_data = {
-            "id": champion_id,
-            "name": f"Champion_{champion_id}",
-            "image_url": f"https://ddragon.leagueoflegends.com/cdn/13.24.1/img/champion/{champion_id}.png"
-        }
-        return champion_data
+        """챔피언 데이터 조회 (로컬 Data Dragon 인덱스, API 호출 없음)"""
+        return champion_index.to_dict(champion_id)
     
-    async def get_player_full_info(self, game_name: str, tag_line: str) -> Optional[Dict]:
-        """플레이어의 전체 정보 조회 (소환사 + 리그 + 챔피언 마스터리)"""
+    def player_lookup(self, game_name: str, tag_line: str, include_summoner: bool = False,
+                      mastery_count: int = 5, match_count: int = 10):
+        """플레이어 조회 그래프: 계정(PUUID) 조회 후 리그/숙련도/최근 매치를 PUUID로 동시에
+
+        소환사 정보(레벨, 아이콘)는 include_summoner일 때만 조회
+        """
+        return build_player_lookup(
+            account=lambda r: self.get_summoner_by_riot_id(game_name, tag_line),
+            league=lambda r: self.get_league_entries_by_puuid(r['account']['puuid']),
+            mastery=lambda r: self.get_champion_mastery_by_puuid(r['account']['puuid'], mastery_count),
+            match_ids=lambda r: self.get_recent_match_ids(r['account']['puuid'], match_count),
+            summoner=(lambda r: self.get_summoner_by_puuid(r['account']['puuid'])) if include_summoner else None,
+        )
+
+    async def get_player_full_info(self, game_name: str, tag_line: str, include_summoner: bool = False) -> Optional[Dict]:
+        """플레이어의 전체 정보 조회 (리그 + 챔피언 마스터리 + 최근 매치, 필요하면 소환사 정보)"""
         try:
-            # 1. 라이엇 ID로 PUUID 조회
-            account_info = await self.get_summoner_by_riot_id(game_name, tag_line)
+            result = await self.player_lookup(game_name, tag_line, include_summoner).run()
+            account_info = result.get('account')
             if not account_info:
                 return None
-            
-            puuid = account_info['puuid']
-            
-            # 2. PUUID로 소환사 상세 정보 조회
-            summoner_info = await self.get_summoner_by_puuid(puuid)
-            if not summoner_info:
+            summoner_info = result.get('summoner', {})
+            if include_summoner and not summoner_info:
                 return None
             
-            summoner_id = summoner_info['id']
-            
-            # 3. 리그 정보 조회
-            league_entries = await self.get_league_entries(summoner_id)
-            
-            # 4. 챔피언 마스터리 조회
-            champion_masteries = await self.get_champion_mastery(summoner_id, 5)
+            league_entries = result.get('league', [])
             
-            # 5. 정보 통합
+            # 정보 통합
             player_info = {
-                'puuid': puuid,
-                'summoner_id': summoner_id,
+                'puuid': account_info['puuid'],
+                'summoner_id': summoner_info.get('id'),
                 'game_name': game_name,
                 'tag_line': tag_line,
-                'summoner_level': summoner_info.get('summonerLevel', 0),
-                'profile_icon_id': summoner_info.get('profileIconId', 0),
+                'summoner_level': summoner_info.get('summonerLevel'),
+                'profile_icon_id': summoner_info.get('profileIconId'),
                 'league': league_entries[0] if league_entries else None,
-                'champion_masteries': champion_masteries,
+                'champion_masteries': result.get('mastery', []),
+                'recent_match_ids': result.get('match_ids', []),
+                'stage_timings_ms': result.timings,
                 'last_updated': datetime.now().isoformat()
             }
             
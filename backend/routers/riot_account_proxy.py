@@ -1,18 +1,46 @@
-from fastapi import APIRouter, HTTPException, Query
-import os, requests
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+import os, json, hashlib
+from ..services.riot_http import riot_http, riot_base_url
+from ..services.riot_cache import NEGATIVE_TTL
+from ..services.riot_id import is_valid_riot_id
+from ..services.riot_metrics import use_feature
 
 router = APIRouter(prefix="/api/riot/account", tags=["riot"])
 RIOT_TOKEN = os.getenv("RIOT_API_KEY")
-ASIA = "https://asia.api.riotgames.com"
+ASIA = riot_base_url("https://asia.api.riotgames.com")
+# Riot ID -> PUUID는 거의 바뀌지 않으므로 브라우저도 이 시간 동안은 재사용
+ACCOUNT_MAX_AGE = int(os.getenv("RIOT_ACCOUNT_MAX_AGE", "3600"))
+
+def _etag(body: dict) -> str:
+    digest = hashlib.sha1(json.dumps(body, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+    return f'"{digest[:16]}"'
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # 약한 비교: W/ 접두어는 무시, 여러 개나 *도 허용
+    tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
 
 @router.get("/by-riot-id")
-def by_riot_id(gameName: str = Query(...), tagLine: str = Query(...)):
+async def by_riot_id(request: Request, response: Response,
+                     gameName: str = Query(...), tagLine: str = Query(...)):
     if not RIOT_TOKEN:
         raise HTTPException(500, "RIOT_API_KEY missing")
+    if not is_valid_riot_id(gameName, tagLine):
+        raise HTTPException(400, "invalid Riot ID")
     url = f"{ASIA}/riot/account/v1/accounts/by-riot-id/{gameName}/{tagLine}"
-    r = requests.get(url, headers={"X-Riot-Token": RIOT_TOKEN}, timeout=10)
-    if r.status_code != 200:
-        raise HTTPException(r.status_code, r.text)
-    data = r.json()
+    # 다른 라이엇 호출과 같은 커넥션 풀 / 레이트 리미터 / 응답 캐시(404 포함) 사용
+    with use_feature("proxy"):
+        r = await riot_http.get_json(url, "account-v1.by-riot-id", {"X-Riot-Token": RIOT_TOKEN}, cache_kind="account")
+    if r.status == 404:
+        raise HTTPException(404, r.data, headers={"Cache-Control": f"private, max-age={NEGATIVE_TTL}"})
+    if r.status != 200:
+        raise HTTPException(r.status, r.data)
     # 최소한의 필드만 리턴
-    return { "gameName": data.get("gameName"), "tagLine": data.get("tagLine"), "puuid": data.get("puuid") }
+    body = { "gameName": r.data.get("gameName"), "tagLine": r.data.get("tagLine"), "puuid": r.data.get("puuid") }
+
+    etag = _etag(body)
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={ACCOUNT_MAX_AGE}"}
+    if _etag_matches(request.headers.get("If-None-Match", ""), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return body
@@ -1,11 +1,16 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
+import asyncio, os
 from ..services.riot_client import (
-    get_account_by_riot_id, get_summoner_by_puuid, get_league_entries,
-    get_recent_match_ids, get_match
+    get_account_by_riot_id, get_league_entries_by_puuid,
+    get_new_match_ids, get_match, record_match_history, local_match_history
 )
-from ..services.balance import rank_to_score, blend_score, best_split_5v5
+from ..services.balance import rank_to_score, blend_score, split_teams, team_sizes, MATRIX_MAX_PLAYERS
+from ..services.lane_balance import split_with_lanes, top_splits, OFF_ROLE_PENALTY, LANE_WEIGHT
+from ..services.multi_lobby import plan_lobbies, shutdown_pool, LOBBY_SIZE, MODES, BENCH_MODES, MULTI_LOBBY_TIME_BUDGET
+from ..services.player_lookup import build_player_lookup
+from ..services.riot_metrics import use_feature
 
 router = APIRouter(prefix="/api/riot", tags=["riot"])
 
@@ -13,10 +18,16 @@ class PlayerIn(BaseModel):
     gameName: str
     tagLine: str
     platform: str = "KR"
+    mainLane: Optional[str] = None          # players 테이블과 같은 값 (TOP, MID ADC, FILL 등)
+    preferredLanes: List[str] = []
 
 class TeamBalanceRequest(BaseModel):
     players: List[PlayerIn]
     recent: int = 8
+    laneAware: bool = False                 # 라인까지 고려해 나누고 팀별 라인 배정
+    offRolePenalty: float = OFF_ROLE_PENALTY
+    laneWeight: float = LANE_WEIGHT
+    alternatives: int = 0                   # 1 이상이면 서로 충분히 다른 대안 분할을 좋은 순으로 (최대 20)
 
 class PlayerOut(BaseModel):
     gameName: str
@@ -26,70 +37,252 @@ class PlayerOut(BaseModel):
     lp: int
     winrate: Optional[float]
     score: float
+    error: Optional[str] = None
+    timings: Dict[str, float] = {}
+    lane: Optional[str] = None              # laneAware일 때 배정된 라인
+
+class SplitAlternative(BaseModel):
+    teams: List[List[PlayerOut]]
+    diff: float
+    laneCost: Optional[float] = None
 
 class TeamBalanceResponse(BaseModel):
     teamA: List[PlayerOut]
     teamB: List[PlayerOut]
     diff: float
+    laneCost: Optional[float] = None
+    alternatives: List[SplitAlternative] = []
+    failed: List[str] = []
+
+class TeamSplitRequest(TeamBalanceRequest):
+    teams: int = 2
+    teamSize: Optional[int] = None   # 없으면 인원을 최대한 고르게 (9명 3팀, 7명 4:3 등)
+
+class TeamSplitResponse(BaseModel):
+    teams: List[List[PlayerOut]]
+    diff: float
+    gap: float          # 최적해와의 차이 상한 (diff - 증명된 하한, 정확 탐색이면 0)
+    optimal: bool
+    method: str
+    elapsedMs: float
+    laneCost: Optional[float] = None
+    alternatives: List[SplitAlternative] = []
+    failed: List[str] = []
+
+class LobbyPlanRequest(BaseModel):
+    players: List[PlayerIn]                 # 신청 순서대로
+    recent: int = 8
+    mode: str = "similar"                   # similar: 로비끼리 평균 실력을 맞춤, stratified: 실력대별로 로비 구성
+    bench: str = "latest"                   # latest: 늦게 신청한 사람이 대기, auto: 밸런스에 맞게 대기 인원 선택
+    timeBudget: Optional[float] = None      # 탐색 시간(초), 없으면 MULTI_LOBBY_TIME_BUDGET
+
+class LobbyOut(BaseModel):
+    teamA: List[PlayerOut]
+    teamB: List[PlayerOut]
+    diff: float
+    average: float
+
+class LobbyPlanResponse(BaseModel):
+    lobbies: List[LobbyOut]
+    bench: List[PlayerOut]
+    objective: float
+    mode: str
+    restarts: int
+    elapsedMs: float
+    failed: List[str] = []
+
+# 한 요청 안에서 동시에 보내는 라이엇 호출 수 (레이트 리미터가 최종 한도를 지킴)
+BALANCE_CONCURRENCY = int(os.getenv("RIOT_BALANCE_CONCURRENCY", "16"))
+# /balance 한 번에 나눌 수 있는 최대 인원
+BALANCE_MAX_PLAYERS = 40
+# 한 번에 돌려주는 최대 대안 분할 수
+MAX_ALTERNATIVES = 20
+# /balance-lobbies 요청이 정할 수 있는 최대 탐색 시간(초)
+MAX_LOBBY_TIME_BUDGET = 5.0
+
+def weighted_winrate(matches: List[dict], puuid: str) -> Optional[float]:
+    """최근 매치 승률 (weighted: 70% solo, 30% flex)"""
+    solo_wins = solo_total = 0
+    flex_wins = flex_total = 0
+    for m in matches:
+        info = m.get("info", {})
+        queue_id = info.get("queueId")
+        me = next((pp for pp in info.get("participants", []) if pp.get("puuid")==puuid), None)
+        if not me:
+            continue
+        if queue_id == 420:  # Ranked Solo
+            solo_total += 1
+            if me.get("win"):
+                solo_wins += 1
+        elif queue_id == 440:  # Ranked Flex
+            flex_total += 1
+            if me.get("win"):
+                flex_wins += 1
+
+    solo_wr = None if solo_total == 0 else solo_wins / solo_total
+    flex_wr = None if flex_total == 0 else flex_wins / flex_total
+
+    if solo_wr is None and flex_wr is None:
+        return None
+    elif solo_wr is None:
+        return flex_wr
+    elif flex_wr is None:
+        return solo_wr
+    return solo_wr * 0.7 + flex_wr * 0.3
+
+async def _limited(sem: asyncio.Semaphore, coro):
+    async with sem:
+        return await coro
+
+async def _recent_winrate(sem: asyncio.Semaphore, platform: str, puuid: str, new_ids: List[str],
+                          recent: int) -> Optional[float]:
+    # 새 매치만 받아 로컬 기록에 합치고, 승률은 로컬 기록의 최근 N판으로 계산
+    results = await asyncio.gather(*[_limited(sem, get_match(platform, mid)) for mid in new_ids],
+                                   return_exceptions=True)
+    record_match_history(puuid, results)
+    return weighted_winrate(local_match_history(puuid, recent), puuid)
+
+async def _resolve_player(sem: asyncio.Semaphore, p: PlayerIn, recent: int) -> PlayerOut:
+    # 계정(PUUID) → 리그 / 새 매치 ID → 승률 (소환사 ID 조회 없이 PUUID로 바로)
+    graph = build_player_lookup(
+        account=lambda r: _limited(sem, get_account_by_riot_id(p.platform, p.gameName, p.tagLine)),
+        league=lambda r: _limited(sem, get_league_entries_by_puuid(p.platform, r["account"]["puuid"])),
+        match_ids=lambda r: _limited(sem, get_new_match_ids(p.platform, r["account"]["puuid"], recent)),
+    ).stage("winrate", lambda r: _recent_winrate(sem, p.platform, r["account"]["puuid"], r["match_ids"], recent),
+            deps=["match_ids"])
+    result = await graph.run()
+    leagues = result.require("league")
+    wr = result.get("winrate")
+    solo = next((e for e in leagues if e.get("queueType")=="RANKED_SOLO_5x5"), None) or {}
+    tier = solo.get("tier"); rank = solo.get("rank"); lp = int(solo.get("leaguePoints", 0))
+
+    rscore = rank_to_score(tier, rank, lp)
+    score = blend_score(rscore, wr)
+    return PlayerOut(
+        gameName=p.gameName, tagLine=p.tagLine,
+        tier=tier, rank=rank, lp=lp, winrate=wr, score=score, timings=result.timings
+    )
+
+async def _resolve_players(players: List[PlayerIn], recent: int, feature: str):
+    sem = asyncio.Semaphore(BALANCE_CONCURRENCY)
+    with use_feature(feature):
+        results = await asyncio.gather(
+            *[_resolve_player(sem, p, recent) for p in players],
+            return_exceptions=True,
+        )
+
+    # 조회에 실패한 플레이어는 언랭 점수로 두고 나머지 결과는 그대로 돌려준다
+    computed: List[PlayerOut] = []
+    failed: List[str] = []
+    for p, res in zip(players, results):
+        if isinstance(res, Exception):
+            failed.append(f"{p.gameName}#{p.tagLine}")
+            res = PlayerOut(
+                gameName=p.gameName, tagLine=p.tagLine,
+                tier=None, rank=None, lp=0, winrate=None, score=blend_score(0, None), error=str(res)
+            )
+        computed.append(res)
+    return computed, failed
+
+def _lane_teams(payload: TeamBalanceRequest, computed: List[PlayerOut], team_size: Optional[int]):
+    split = split_with_lanes(
+        [c.score for c in computed], [(p.mainLane, p.preferredLanes) for p in payload.players],
+        team_size=team_size, off_role_penalty=payload.offRolePenalty, lane_weight=payload.laneWeight,
+    )
+    teams = [[computed[i].model_copy(update={"lane": lane}) for i, lane in zip(team, roles)]
+             for team, roles in zip(split.teams, split.roles)]
+    return split, teams
+
+def _alternatives(payload: TeamBalanceRequest, computed: List[PlayerOut],
+                  team_size: Optional[int]) -> List[SplitAlternative]:
+    if payload.alternatives <= 0:
+        return []
+    lanes = [(p.mainLane, p.preferredLanes) for p in payload.players] if payload.laneAware else None
+    options = top_splits(
+        [c.score for c in computed], min(payload.alternatives, MAX_ALTERNATIVES), lanes, team_size=team_size,
+        off_role_penalty=payload.offRolePenalty, lane_weight=payload.laneWeight,
+    )
+    return [
+        SplitAlternative(
+            teams=[[computed[i].model_copy(update={"lane": roles[n] if roles else None}) for n, i in enumerate(team)]
+                   for team, roles in zip(o.teams, o.roles or [None, None])],
+            diff=o.diff, laneCost=o.lane_cost if lanes else None,
+        )
+        for o in options
+    ]
 
 @router.post("/balance-5v5", response_model=TeamBalanceResponse)
-def balance_5v5(payload: TeamBalanceRequest):
+async def balance_5v5(payload: TeamBalanceRequest):
     if len(payload.players) != 10:
         raise HTTPException(status_code=400, detail="players must be exactly 10.")
 
-    computed: List[PlayerOut] = []
-    for p in payload.players:
-        acc = get_account_by_riot_id(p.platform, p.gameName, p.tagLine)
-        summ = get_summoner_by_puuid(p.platform, acc["puuid"])
-        leagues = get_league_entries(p.platform, summ["id"])
-        solo = next((e for e in leagues if e.get("queueType")=="RANKED_SOLO_5x5"), None) or {}
-        tier = solo.get("tier"); rank = solo.get("rank"); lp = int(solo.get("leaguePoints", 0))
-
-        # recent winrate (weighted: 70% solo, 30% flex)
-        try:
-            ids = get_recent_match_ids(p.platform, summ["puuid"], payload.recent)
-            solo_wins = solo_total = 0
-            flex_wins = flex_total = 0
-            for mid in ids:
-                m = get_match(p.platform, mid)
-                info = m.get("info", {})
-                queue_id = info.get("queueId")
-                me = next((pp for pp in info.get("participants", []) if pp.get("puuid")==summ["puuid"]), None)
-                if not me:
-                    continue
-                if queue_id == 420:  # Ranked Solo
-                    solo_total += 1
-                    if me.get("win"):
-                        solo_wins += 1
-                elif queue_id == 440:  # Ranked Flex
-                    flex_total += 1
-                    if me.get("win"):
-                        flex_wins += 1
-
-            solo_wr = None if solo_total == 0 else solo_wins / solo_total
-            flex_wr = None if flex_total == 0 else flex_wins / flex_total
-
-            if solo_wr is None and flex_wr is None:
-                wr = None
-            elif solo_wr is None:
-                wr = flex_wr
-            elif flex_wr is None:
-                wr = solo_wr
-            else:
-                wr = solo_wr * 0.7 + flex_wr * 0.3
-        except Exception:
-            wr = None
-
-        rscore = rank_to_score(tier, rank, lp)
-        score = blend_score(rscore, wr)
-
-        computed.append(PlayerOut(
-            gameName=p.gameName, tagLine=p.tagLine,
-            tier=tier, rank=rank, lp=lp, winrate=wr, score=score
-        ))
-
-    scores = [c.score for c in computed]
-    a_idx, b_idx, diff = best_split_5v5(scores)
-    teamA = [computed[i] for i in a_idx]
-    teamB = [computed[i] for i in b_idx]
-    return TeamBalanceResponse(teamA=teamA, teamB=teamB, diff=diff)
+    computed, failed = await _resolve_players(payload.players, payload.recent, "balance-5v5")
+    alternatives = _alternatives(payload, computed, 5)
+    if payload.laneAware:
+        split, (teamA, teamB) = _lane_teams(payload, computed, 5)
+        return TeamBalanceResponse(teamA=teamA, teamB=teamB, diff=split.diff, laneCost=split.lane_cost,
+                                   alternatives=alternatives, failed=failed)
+    split = split_teams([c.score for c in computed], teams=2, team_size=5)
+    teamA = [computed[i] for i in split.teams[0]]
+    teamB = [computed[i] for i in split.teams[1]]
+    return TeamBalanceResponse(teamA=teamA, teamB=teamB, diff=split.diff, alternatives=alternatives, failed=failed)
+
+@router.post("/balance", response_model=TeamSplitResponse)
+async def balance(payload: TeamSplitRequest):
+    """인원/팀 수를 지정하는 일반 밸런스 (3:3 칼바람, 4:4, 인원이 안 맞는 내전 등)"""
+    if len(payload.players) > BALANCE_MAX_PLAYERS:
+        raise HTTPException(status_code=400, detail=f"players must be at most {BALANCE_MAX_PLAYERS}.")
+    # 팀당 최소 2명 (1인 팀이 많은 분할은 밸런스 의미가 없고 탐색만 커짐)
+    if not 2 <= payload.teams <= len(payload.players) // 2:
+        raise HTTPException(status_code=400, detail=f"teams must be between 2 and {len(payload.players) // 2}.")
+    try:
+        sizes = team_sizes(len(payload.players), payload.teams, payload.teamSize)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if payload.laneAware and (len(sizes) != 2 or max(sizes) > 5):
+        raise HTTPException(status_code=400, detail="laneAware supports 2 teams of at most 5 players.")
+    if payload.alternatives > 0 and (len(sizes) != 2 or len(payload.players) > MATRIX_MAX_PLAYERS):
+        raise HTTPException(status_code=400, detail=f"alternatives supports 2 teams of at most {MATRIX_MAX_PLAYERS} players in total.")
+
+    computed, failed = await _resolve_players(payload.players, payload.recent, "balance")
+    alternatives = _alternatives(payload, computed, payload.teamSize)
+    if payload.laneAware:
+        split, teams = _lane_teams(payload, computed, payload.teamSize)
+        return TeamSplitResponse(
+            teams=teams, diff=split.diff, gap=0.0, optimal=True, method="lanes",
+            elapsedMs=split.elapsed_ms, laneCost=split.lane_cost, alternatives=alternatives, failed=failed,
+        )
+    split = split_teams([c.score for c in computed], teams=len(sizes), team_size=payload.teamSize)
+    return TeamSplitResponse(
+        teams=[[computed[i] for i in team] for team in split.teams], diff=split.diff, gap=split.gap,
+        optimal=split.optimal, method=split.method, elapsedMs=split.elapsed_ms,
+        alternatives=alternatives, failed=failed,
+    )
+
+@router.on_event("shutdown")
+async def _shutdown_lobby_pool():
+    # 로비 나누기용 프로세스 풀 정리
+    shutdown_pool()
+
+@router.post("/balance-lobbies", response_model=LobbyPlanResponse)
+async def balance_lobbies(payload: LobbyPlanRequest):
+    """신청 인원을 10명 로비 여러 개와 대기 인원으로 나누고 로비마다 5:5로 나눔"""
+    if not LOBBY_SIZE <= len(payload.players) <= BALANCE_MAX_PLAYERS:
+        raise HTTPException(status_code=400, detail=f"players must be between {LOBBY_SIZE} and {BALANCE_MAX_PLAYERS}.")
+    budget = MULTI_LOBBY_TIME_BUDGET if payload.timeBudget is None else payload.timeBudget
+    if not 0 < budget <= MAX_LOBBY_TIME_BUDGET:
+        raise HTTPException(status_code=400, detail=f"timeBudget must be in (0, {MAX_LOBBY_TIME_BUDGET}].")
+    if payload.mode not in MODES or payload.bench not in BENCH_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {MODES} and bench one of {BENCH_MODES}.")
+
+    computed, failed = await _resolve_players(payload.players, payload.recent, "balance-lobbies")
+    plan = await plan_lobbies([c.score for c in computed], mode=payload.mode, bench=payload.bench, time_budget=budget)
+    return LobbyPlanResponse(
+        lobbies=[
+            LobbyOut(teamA=[computed[i] for i in lobby.teams[0]], teamB=[computed[i] for i in lobby.teams[1]],
+                     diff=lobby.diff, average=lobby.average)
+            for lobby in plan.lobbies
+        ],
+        bench=[computed[i] for i in plan.bench], objective=plan.objective, mode=plan.mode,
+        restarts=plan.restarts, elapsedMs=plan.elapsed_ms, failed=failed,
+    )
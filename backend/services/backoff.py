@@ -0,0 +1,80 @@
+import asyncio
+import random
+import time
+from typing import Dict, Optional, Tuple
+from .rate_ledger import RateLedger
+
+BACKOFF_BASE = 0.5   # 첫 재시도 최대 지연(초)
+BACKOFF_CAP = 30.0   # 재시도 지연 상한(초)
+
+
+def jittered_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """지수 증가 + full jitter 재시도 지연"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class RouteBackoff:
+    """429를 받은 라우트(호스트/메서드)를 모든 호출자가 함께 쉬게 하는 공유 백오프 상태
+
+    스레드나 이벤트 루프를 막지 않고, 대기 중인 호출은 asyncio.sleep으로 리셋 시각까지 기다린다.
+    ledger를 주면 다른 워커 프로세스가 받은 429도 함께 반영한다.
+    """
+
+    def __init__(self, ledger: Optional[RateLedger] = None):
+        # (host, method) -> 재개 시각(monotonic). method가 ""면 호스트 전체(앱 한도)
+        self._until: Dict[Tuple[str, str], float] = {}
+        self._waiting: Dict[Tuple[str, str], int] = {}
+        self.ledger = ledger
+        self.throttled = 0
+
+    def block(self, host: str, method: str, seconds: float, limit_type: Optional[str] = None):
+        """429 응답 반영: 앱 한도면 호스트 전체, 메서드/서비스 한도면 해당 메서드만 멈춤"""
+        self.throttled += 1
+        key = (host, "") if (limit_type or "").lower() == "application" else (host, method)
+        until = time.monotonic() + max(seconds, 0)
+        self._until[key] = max(self._until.get(key, 0), until)
+        if self.ledger is not None:
+            # 장부 쓰기는 다른 워커의 트랜잭션을 기다릴 수 있으므로 스레드에 맡기고 기다리지 않음
+            args = (*key, time.time() + max(seconds, 0))
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.ledger.block(*args)
+            else:
+                loop.run_in_executor(None, self.ledger.block, *args)
+
+    def remaining(self, host: str, method: str) -> float:
+        now = time.monotonic()
+        local = max(self._until.get((host, ""), 0), self._until.get((host, method), 0)) - now
+        if self.ledger is None:
+            return local
+        return max(local, self.ledger.blocked_until(host, method) - time.time())
+
+    async def wait(self, host: str, method: str):
+        """해당 라우트가 백오프 중이면 끝난 뒤 0~BACKOFF_BASE초 더 기다림 (대기자마다 다른 지터)"""
+        key = (host, method)
+        while True:
+            wait = self.remaining(host, method)
+            if wait <= 0:
+                return
+            self._waiting[key] = self._waiting.get(key, 0) + 1
+            try:
+                # 공유 재개 시각은 그대로 두고 대기자마다 지터를 더해, 리셋 순간 한꺼번에 몰리지 않게 함
+                await asyncio.sleep(wait + random.uniform(0, BACKOFF_BASE))
+            finally:
+                self._waiting[key] -= 1
+                if not self._waiting[key]:
+                    del self._waiting[key]
+
+    def stats(self) -> Dict:
+        now = time.monotonic()
+        blocked = {key: u - now for key, u in self._until.items() if u > now}
+        if self.ledger is not None:
+            wall = time.time()
+            for key, u in self.ledger.blocks().items():
+                blocked[key] = max(blocked.get(key, 0), u - wall)
+        return {
+            "throttled": self.throttled,
+            "blocked": {f"{h}{'/' + m if m else ''}": round(u, 2) for (h, m), u in blocked.items()},
+            "waiting": {f"{h}/{m}": n for (h, m), n in self._waiting.items()},
+        }
@@ -1,5 +1,10 @@
-from typing import Optional, List, Tuple
+import os
+import time
+import heapq
 import itertools
+from math import factorial, gcd
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
 
 TIER_BASE = {
     "IRON": 0, "BRONZE": 200, "SILVER": 400, "GOLD": 600, "PLATINUM": 800,
@@ -7,6 +12,14 @@ TIER_BASE = {
 }
 DIV_ADDER = {"IV": 0, "III": 50, "II": 100, "I": 150}
 
+# 정확 탐색을 쓰는 크기 한계
+MATRIX_MAX_PLAYERS = 16         # 2팀: 모든 분할을 소속 행렬 x 점수 벡터 한 번으로 계산
+MITM_MAX_PLAYERS = 36           # 2팀: 반씩 나눠 부분집합 합을 정렬해 맞춰 봄 (meet-in-the-middle)
+EXACT_MAX_PARTITIONS = 50_000   # 3팀 이상: 이보다 분할 수가 적으면 전부 탐색
+EXACT_MAX_PLAYERS = 20          # 3팀 이상 전부 탐색은 부분집합 합(2^n)을 만들므로 인원도 제한
+# 그보다 크면 Karmarkar–Karp 분할 후 맞교환 로컬 서치에 쓰는 시간(초)
+BALANCE_TIME_BUDGET = float(os.getenv("BALANCE_TIME_BUDGET", "0.2"))
+
 def rank_to_score(tier: Optional[str], rank: Optional[str], lp: int) -> int:
     if not tier: return 0
     t = tier.upper()
@@ -19,12 +32,274 @@ def blend_score(rank_score: int, winrate: Optional[float]) -> float:
     win_bonus = 0.0 if winrate is None else (winrate - 0.50) * 400  # 10%p ~= 40점
     return rank_score * 0.7 + win_bonus * 0.3
 
-def best_split_5v5(scores: List[float]) -> Tuple[List[int], List[int], float]:
-    idxs = list(range(10)); best = None; best_diff = 1e9
-    for team_a in itertools.combinations(idxs, 5):
-        if 0 not in team_a: continue  # mirror 제거
-        team_b = [i for i in idxs if i not in team_a]
-        a = sum(scores[i] for i in team_a); b = sum(scores[i] for i in team_b)
-        diff = abs(a - b)
-        if diff < best_diff: best_diff, best = diff, (list(team_a), team_b)
-    return best[0], best[1], best_diff
+class TeamSplit(NamedTuple):
+    teams: List[List[int]]   # 팀별 플레이어 인덱스 (인원이 많은 팀부터)
+    diff: float              # 점수 합이 가장 큰 팀과 가장 작은 팀의 차이
+    gap: float               # diff - spread_lower_bound (정확 탐색이면 0)
+    optimal: bool
+    method: str              # matrix / mitm / exact / kk
+    elapsed_ms: float
+
+def team_sizes(n: int, teams: int = 2, team_size: Optional[int] = None) -> List[int]:
+    """팀별 인원 (team_size가 없으면 최대한 고르게, 남는 인원은 앞 팀부터 1명씩)"""
+    if teams < 2:
+        raise ValueError("teams must be at least 2.")
+    if team_size is not None:
+        if team_size * teams != n:
+            raise ValueError(f"{n} players cannot be split into {teams} teams of {team_size}.")
+        return [team_size] * teams
+    base, extra = divmod(n, teams)
+    if base < 1:
+        raise ValueError(f"{n} players are not enough for {teams} teams.")
+    return [base + 1] * extra + [base] * (teams - extra)
+
+def _spread(scores: Sequence[float], teams: List[List[int]]) -> float:
+    sums = [sum(scores[i] for i in team) for team in teams]
+    return max(sums) - min(sums)
+
+def _mask_members(mask: int, players: Sequence[int]) -> List[int]:
+    return [p for bit, p in enumerate(players) if mask >> bit & 1]
+
+def subset_sums(values: Sequence[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """모든 부분집합의 합과 인원 수 (인덱스 i의 j번째 비트 = values[j] 포함 여부)"""
+    sums = np.zeros(1)
+    counts = np.zeros(1, dtype=np.int8)
+    for v in values:
+        sums = np.concatenate([sums, sums + v])
+        counts = np.concatenate([counts, counts + 1])
+    return sums, counts
+
+# (인원, 첫 팀 인원) -> 분할별 소속 행렬, 로비 크기마다 한 번만 만들어 재사용
+_MEMBERSHIP: Dict[Tuple[int, int], np.ndarray] = {}
+
+def membership_matrix(n: int, size: Optional[int] = None) -> np.ndarray:
+    """2팀 분할마다 한 행: 첫 팀이면 +1, 둘째 팀이면 -1 (분할 수 x n, 읽기 전용)
+
+    두 팀 인원이 같으면 0번이 첫 팀인 분할만 (mirror 제거), 5:5면 126행.
+    """
+    size = (n + 1) // 2 if size is None else size
+    matrix = _MEMBERSHIP.get((n, size))
+    if matrix is None:
+        combos = [c for c in itertools.combinations(range(n), size) if size * 2 != n or c[0] == 0]
+        matrix = -np.ones((len(combos), n))
+        matrix[np.repeat(np.arange(len(combos)), size), np.asarray(combos).ravel()] = 1.0
+        matrix.flags.writeable = False
+        _MEMBERSHIP[(n, size)] = matrix
+    return matrix
+
+class SplitTable(NamedTuple):
+    diffs: np.ndarray        # 모든 분할의 점수 차이 (오름차순)
+    order: np.ndarray        # diffs[i]에 해당하는 membership 행 번호
+    membership: np.ndarray
+
+    def teams(self, rank: int = 0) -> List[List[int]]:
+        """rank번째로 차이가 작은 분할의 (첫 팀, 둘째 팀)"""
+        row = self.membership[self.order[rank]]
+        return [np.flatnonzero(row > 0).tolist(), np.flatnonzero(row < 0).tolist()]
+
+def evaluate_splits(scores: Sequence[float], size: Optional[int] = None) -> SplitTable:
+    """2팀 분할 전체의 점수 차이를 행렬-벡터 곱 한 번으로 계산해 작은 순으로 정렬"""
+    matrix = membership_matrix(len(scores), size)
+    diffs = np.abs(matrix @ np.asarray(scores, dtype=float))
+    order = np.argsort(diffs, kind="stable")
+    return SplitTable(diffs[order], order, matrix)
+
+def evaluate_splits_batch(lobbies: Sequence[Sequence[float]], size: Optional[int] = None) -> List[SplitTable]:
+    """같은 인원의 로비 여러 개를 행렬 곱 한 번으로 (what-if 비교용)"""
+    lobbies = np.asarray(lobbies, dtype=float)
+    matrix = membership_matrix(lobbies.shape[1], size)
+    diffs = np.abs(matrix @ lobbies.T).T          # (로비 수 x 분할 수)
+    order = np.argsort(diffs, axis=1, kind="stable")
+    diffs = np.take_along_axis(diffs, order, axis=1)
+    return [SplitTable(d, o, matrix) for d, o in zip(diffs, order)]
+
+def _split_mitm(scores: Sequence[float], sizes: List[int]) -> List[List[int]]:
+    # 앞/뒤 절반의 부분집합 합을 각각 만들고, 뒤쪽을 인원별로 정렬해 total/2에 가장 가까운 짝을 이분 탐색
+    n, total = len(scores), float(sum(scores))
+    half = n // 2
+    left, right = list(range(half)), list(range(half, n))
+    l_sums, l_counts = subset_sums([scores[i] for i in left])
+    r_sums, r_counts = subset_sums([scores[i] for i in right])
+    best = (float("inf"), 0, 0)
+    for lc in range(max(0, sizes[0] - len(right)), min(len(left), sizes[0]) + 1):
+        l_masks = np.flatnonzero(l_counts == lc)
+        r_masks = np.flatnonzero(r_counts == sizes[0] - lc)
+        r_masks = r_masks[np.argsort(r_sums[r_masks], kind="stable")]
+        r_sorted = r_sums[r_masks]
+        need = total / 2 - l_sums[l_masks]
+        pos = np.searchsorted(r_sorted, need)
+        for cand in (np.clip(pos - 1, 0, len(r_sorted) - 1), np.clip(pos, 0, len(r_sorted) - 1)):
+            diffs = np.abs(2 * (l_sums[l_masks] + r_sorted[cand]) - total)
+            i = int(np.argmin(diffs))
+            if diffs[i] < best[0]:
+                best = (float(diffs[i]), int(l_masks[i]), int(r_masks[cand[i]]))
+    team_a = _mask_members(best[1], left) + _mask_members(best[2], right)
+    return [team_a, [i for i in range(n) if i not in team_a]]
+
+def partition_count(sizes: List[int]) -> int:
+    """팀 순서를 무시한 서로 다른 분할 수"""
+    count = factorial(sum(sizes))
+    for s in sizes:
+        count //= factorial(s)
+    for _, same in itertools.groupby(sizes):
+        count //= factorial(len(list(same)))
+    return count
+
+def _split_exact(scores: Sequence[float], sizes: List[int]) -> List[List[int]]:
+    # 팀을 비트마스크로 앞에서부터 고르고, 마지막 두 팀은 남은 인원에서 가능한 경우를 한 번에 계산.
+    # 같은 인원의 팀끼리는 가장 작은 인덱스가 커지는 순서로만 만들어 중복 분할 제거.
+    # 남은 팀이 모두 같은 인원이면 남은 인원 중 가장 작은 인덱스는 지금 팀에 넣어야 함
+    # (아니면 뒤 팀들이 가져갈 수 없어 끝까지 채워지지 않는 가지만 탐색하게 됨)
+    n, k = len(scores), len(sizes)
+    sums, counts = subset_sums(scores)
+    masks = {size: np.flatnonzero(counts == size) for size in set(sizes)}
+    best: List = [float("inf"), None]
+
+    def candidates(t: int, remaining: int, chosen: List[int]) -> np.ndarray:
+        cand = masks[sizes[t]]
+        cand = cand[(cand & ~remaining) == 0]
+        if all(size == sizes[t] for size in sizes[t:]):
+            cand = cand[(cand & (remaining & -remaining)) != 0]
+        elif t and sizes[t] == sizes[t - 1]:
+            cand = cand[(cand & -cand) > (chosen[-1] & -chosen[-1])]
+        return cand
+
+    def search(t: int, remaining: int, chosen: List[int]):
+        if sizes[t] == 1:
+            # 남은 팀이 모두 1명이면 분할이 하나로 정해짐
+            teams = chosen + [1 << i for i in range(n) if remaining >> i & 1]
+            spread = max(sums[m] for m in teams) - min(sums[m] for m in teams)
+            if spread < best[0]:
+                best[0], best[1] = float(spread), teams
+            return
+        cand = candidates(t, remaining, chosen)
+        if t < k - 2:
+            for mask in cand.tolist():
+                search(t + 1, remaining ^ mask, chosen + [mask])
+            return
+        if not len(cand):
+            return
+        fixed = [sums[m] for m in chosen]
+        a, b = sums[cand], sums[remaining ^ cand]
+        hi = np.maximum(np.maximum(a, b), max(fixed, default=-np.inf))
+        lo = np.minimum(np.minimum(a, b), min(fixed, default=np.inf))
+        i = int(np.argmin(hi - lo))
+        if hi[i] - lo[i] < best[0]:
+            best[0], best[1] = float(hi[i] - lo[i]), chosen + [int(cand[i]), remaining ^ int(cand[i])]
+
+    search(0, (1 << n) - 1, [])
+    return [_mask_members(mask, range(n)) for mask in best[1]]
+
+def _score_unit(scores: Sequence[float]) -> Optional[Tuple[List[int], int]]:
+    # 점수가 모두 소수 둘째 자리까지면 (정수로 바꾼 점수들, 배율)
+    for scale in (1, 10, 100):
+        scaled = [s * scale for s in scores]
+        if all(abs(v - round(v)) < 1e-6 for v in scaled):
+            return [round(v) for v in scaled], scale
+    return None
+
+def spread_lower_bound(scores: Sequence[float], sizes: List[int]) -> float:
+    """어떤 분할도 이보다 작을 수 없는 diff 하한 (휴리스틱 결과의 gap 계산용)
+
+    가장 강한 팀은 평균 이상이고, 최고 점수 플레이어가 든 팀은 그 플레이어 + 가장 낮은 (최소 팀 인원 - 1)명 이상.
+    가장 약한 팀은 평균 이하이고, 최저 점수 플레이어가 든 팀은 그 플레이어 + 가장 높은 (최대 팀 인원 - 1)명 이하.
+    점수가 모두 단위 q의 배수면 팀 합도 q의 배수이므로 합계가 팀 수로 나누어떨어지지 않을 때 diff >= q.
+    """
+    k, ordered = len(sizes), sorted(scores)
+    average = float(sum(ordered)) / k
+    top = ordered[-1] + sum(ordered[:min(sizes) - 1])
+    bottom = ordered[0] + sum(ordered[len(ordered) - max(sizes) + 1:])
+    bound = max(0.0, max(top, average) - min(bottom, average))
+    unit = _score_unit(scores)
+    if unit is not None:
+        ints, scale = unit
+        step = 0
+        for v in ints:
+            step = gcd(step, v)
+        if step and (sum(ints) // step) % k:
+            bound = max(bound, step / scale)
+    return bound
+
+def _karmarkar_karp(scores: Sequence[float], sizes: List[int]) -> List[List[int]]:
+    # 인원 제약이 있는 k-way Karmarkar–Karp (BLDM): 큰 점수부터 k명씩 묶어 부분 분할을 만들고,
+    # 차이가 가장 큰 두 부분 분할을 "큰 팀 + 작은 팀"으로 합치기를 반복
+    k, width = len(sizes), max(sizes)
+    order = sorted(range(len(scores)), key=lambda i: -scores[i])
+    order += [-1] * (k * width - len(order))  # 인원이 적은 팀 자리는 점수 0인 빈자리
+    heap = []
+    for g in range(width):
+        group = [(scores[i] if i >= 0 else 0.0, [i] if i >= 0 else []) for i in order[g * k:(g + 1) * k]]
+        group.sort(key=lambda t: -t[0])
+        heapq.heappush(heap, (-(group[0][0] - group[-1][0]), g, group))
+    while len(heap) > 1:
+        _, g, a = heapq.heappop(heap)
+        _, _, b = heapq.heappop(heap)
+        merged = [(sa + sb, ma + mb) for (sa, ma), (sb, mb) in zip(a, reversed(b))]
+        merged.sort(key=lambda t: -t[0])
+        heapq.heappush(heap, (-(merged[0][0] - merged[-1][0]), g, merged))
+    return [members for _, members in heap[0][2]]
+
+def _local_search(scores: Sequence[float], teams: List[List[int]], deadline: float) -> List[List[int]]:
+    # 가장 강한 팀/가장 약한 팀과 다른 팀 사이의 1:1 맞교환 중 차이를 가장 많이 줄이는 것을 반복
+    sums = [sum(scores[i] for i in team) for team in teams]
+    while time.perf_counter() < deadline:
+        spread = max(sums) - min(sums)
+        hi, lo = sums.index(max(sums)), sums.index(min(sums))
+        best = None
+        for a in dict.fromkeys((hi, lo)):
+            for b in range(len(teams)):
+                if b == a:
+                    continue
+                for x, y in itertools.product(range(len(teams[a])), range(len(teams[b]))):
+                    delta = scores[teams[b][y]] - scores[teams[a][x]]
+                    new = list(sums)
+                    new[a] += delta
+                    new[b] -= delta
+                    gain = spread - (max(new) - min(new))
+                    if gain > 1e-9 and (best is None or gain > best[0]):
+                        best = (gain, a, b, x, y, new)
+        if best is None:
+            break
+        _, a, b, x, y, sums = best
+        teams[a][x], teams[b][y] = teams[b][y], teams[a][x]
+    return teams
+
+def split_teams(scores: Sequence[float], teams: int = 2, team_size: Optional[int] = None,
+                method: str = "auto", time_budget: float = BALANCE_TIME_BUDGET) -> TeamSplit:
+    """점수 합 차이(가장 강한 팀 - 가장 약한 팀)가 가장 작은 팀 분할
+
+    2팀은 16명 이하면 소속 행렬, 36명 이하면 meet-in-the-middle로 정확히,
+    3팀 이상은 20명 이하이고 분할 수가 EXACT_MAX_PARTITIONS 이하면 전부 탐색,
+    그 밖에는 Karmarkar–Karp + 로컬 서치(time_budget초)로 찾고, spread_lower_bound와의 차이를 gap으로 준다.
+    """
+    started = time.perf_counter()
+    sizes = team_sizes(len(scores), teams, team_size)
+    if method == "auto":
+        if teams == 2:
+            method = "matrix" if len(scores) <= MATRIX_MAX_PLAYERS else "mitm" if len(scores) <= MITM_MAX_PLAYERS else "kk"
+        else:
+            exact = len(scores) <= EXACT_MAX_PLAYERS and partition_count(sizes) <= EXACT_MAX_PARTITIONS
+            method = "exact" if exact else "kk"
+    if method in ("matrix", "mitm") and teams != 2:
+        raise ValueError(f"{method} only supports 2 teams.")
+    if method == "exact" and len(scores) > EXACT_MAX_PLAYERS:
+        raise ValueError(f"exact supports at most {EXACT_MAX_PLAYERS} players.")
+
+    if method == "matrix":
+        result = evaluate_splits(scores, sizes[0]).teams()
+    elif method == "mitm":
+        result = _split_mitm(scores, sizes)
+    elif method == "exact":
+        result = _split_exact(scores, sizes)
+    elif method == "kk":
+        result = _local_search(scores, _karmarkar_karp(scores, sizes), started + time_budget)
+    else:
+        raise ValueError(f"Unknown balance method: {method}")
+
+    result = sorted((sorted(team) for team in result), key=lambda team: (-len(team), team[0]))
+    diff = _spread(scores, result)
+    gap = 0.0 if method != "kk" else max(0.0, diff - spread_lower_bound(scores, sizes))
+    return TeamSplit(
+        teams=result, diff=diff, gap=gap, optimal=gap <= 1e-9,
+        method=method, elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
@@ -0,0 +1,69 @@
+import os
+import json
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# tools/build_champion_index.py로 Data Dragon champion.json에서 만든 스냅샷
+CHAMPION_INDEX_PATH = os.getenv("CHAMPION_INDEX_PATH") or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "champion_index.json"
+)
+DDRAGON_CDN = "https://ddragon.leagueoflegends.com/cdn"
+
+
+class Champion(NamedTuple):
+    key: str              # Data Dragon id (예: "MonkeyKing")
+    name: str             # 영문 이름 (예: "Wukong")
+    ko_name: str          # 한글 이름 (예: "오공")
+    tags: Tuple[str, ...]
+
+
+class ChampionIndex:
+    """챔피언 ID -> (key, name, ko_name, tags) 메모리 테이블 (시작할 때 한 번 읽음)"""
+
+    def __init__(self, path: str = CHAMPION_INDEX_PATH):
+        self.path = path
+        self.version: Optional[str] = None
+        self._by_id: Dict[int, Champion] = {}
+
+    def load(self) -> "ChampionIndex":
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        self.version = data["version"]
+        self._by_id = {
+            int(cid): Champion(key, name, ko_name, tuple(tags))
+            for cid, (key, name, ko_name, tags) in data["champions"].items()
+        }
+        return self
+
+    def _ensure_loaded(self):
+        if self.version is None:
+            self.load()
+
+    def get(self, champion_id: int) -> Optional[Champion]:
+        self._ensure_loaded()
+        return self._by_id.get(champion_id)
+
+    def to_dict(self, champion_id: int) -> Optional[Dict]:
+        champion = self.get(champion_id)
+        if champion is None:
+            return None
+        return {
+            "id": champion_id,
+            "key": champion.key,
+            "name": champion.name,
+            "ko_name": champion.ko_name,
+            "tags": list(champion.tags),
+            "image_url": f"{DDRAGON_CDN}/{self.version}/img/champion/{champion.key}.png",
+        }
+
+    def all(self, champion_ids: Optional[Iterable[int]] = None) -> List[Dict]:
+        """전체(또는 지정한 ID들의) 챔피언 정보, 없는 ID는 건너뜀"""
+        self._ensure_loaded()
+        ids = self._by_id.keys() if champion_ids is None else champion_ids
+        return [d for d in (self.to_dict(cid) for cid in ids) if d is not None]
+
+    def stats(self) -> Dict:
+        return {"version": self.version, "champions": len(self._by_id)}
+
+
+# 전역 인스턴스
+champion_index = ChampionIndex()
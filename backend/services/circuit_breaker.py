@@ -0,0 +1,87 @@
+import os
+import time
+from typing import Dict
+
+# 연속으로 이만큼 타임아웃/연결 오류/5xx가 나면 호스트 회로를 연다
+CIRCUIT_FAILURES = int(os.getenv("RIOT_CIRCUIT_FAILURES", "5"))
+# 회로를 연 뒤 시험 요청 하나를 보내기까지 기다리는 시간(초)
+CIRCUIT_COOLDOWN = float(os.getenv("RIOT_CIRCUIT_COOLDOWN", "30"))
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+class CircuitBreaker:
+    """호스트 하나의 회로 차단기
+
+    closed: 평소대로 호출. 연속 실패가 failures번이면 open.
+    open: cooldown 동안 호출하지 않고 바로 실패(또는 만료된 캐시로 응답).
+    half-open: 시험 요청 하나만 보내서 성공하면 closed, 실패하면 다시 open.
+    """
+
+    def __init__(self, failures: int = CIRCUIT_FAILURES, cooldown: float = CIRCUIT_COOLDOWN):
+        self.threshold = failures
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._probe_at = 0.0
+
+    def allow(self) -> bool:
+        """지금 이 호스트로 요청을 보내도 되는지 (half-open이면 시험 요청 하나만 허용)"""
+        if self.state == CLOSED:
+            return True
+        now = time.monotonic()
+        if self.state == OPEN and now - self._opened_at >= self.cooldown:
+            self.state = HALF_OPEN
+            self._probe_at = 0.0
+        # 시험 요청이 취소돼 결과가 안 오면 cooldown 뒤 다른 요청으로 다시 시험
+        if self.state == HALF_OPEN and now - self._probe_at >= self.cooldown:
+            self._probe_at = now
+            return True
+        self.rejected += 1
+        return False
+
+    def retry_after(self) -> float:
+        if self.state == CLOSED:
+            return 0.0
+        return max(0.0, self.cooldown - (time.monotonic() - max(self._opened_at, self._probe_at)))
+
+    def success(self):
+        self.state = CLOSED
+        self.failures = 0
+
+    def failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.threshold):
+            self.state = OPEN
+            self.trips += 1
+            self._opened_at = time.monotonic()
+
+    def snapshot(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutiveFailures": self.failures,
+            "trips": self.trips,
+            "rejected": self.rejected,
+            "retryAfter": round(self.retry_after(), 1),
+        }
+
+
+class CircuitBreakers:
+    """라이엇 호스트(asia/kr/...)별 회로 차단기 모음"""
+
+    def __init__(self, failures: int = CIRCUIT_FAILURES, cooldown: float = CIRCUIT_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, host: str) -> CircuitBreaker:
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(self.failures, self.cooldown)
+        return breaker
+
+    def stats(self) -> Dict:
+        return {host: breaker.snapshot() for host, breaker in self._breakers.items()}
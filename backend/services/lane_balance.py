@@ -0,0 +1,278 @@
+import os
+import time
+import heapq
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+import numpy as np
+from .balance import MATRIX_MAX_PLAYERS, evaluate_splits, membership_matrix, team_sizes
+
+LANES = ("TOP", "JUNGLE", "MID", "ADC", "SUPPORT")
+LANE_ALIASES = {"BOT": "ADC", "BOTTOM": "ADC", "MIDDLE": "MID", "UTILITY": "SUPPORT", "SUP": "SUPPORT", "JG": "JUNGLE"}
+FILL_LANES = ("FILL", "UNKNOWN", "ALL", "ANY")
+
+PREFERRED_COST = 1.0   # 주 라인 0, 선호 라인 1
+# 주/선호 라인이 아닌 곳에 배정될 때의 비용
+OFF_ROLE_PENALTY = float(os.getenv("BALANCE_OFF_ROLE_PENALTY", "3"))
+# 라인 비용 1을 점수 차이 몇 점으로 볼지 (50점 = 한 디비전)
+LANE_WEIGHT = float(os.getenv("BALANCE_LANE_WEIGHT", "40"))
+# 대안 분할끼리 점수 차이가 이 이하인 두 명만 맞바꾼 관계면 사실상 같은 분할로 보고 하나만 남김
+SWAP_TOLERANCE = float(os.getenv("BALANCE_SWAP_TOLERANCE", "30"))
+
+LaneInput = Union[str, Iterable[str], None]
+
+
+def parse_lanes(value: LaneInput) -> List[str]:
+    """'MID ADC', ['JUNGLE SUPPORT'] 같은 값을 LANES 이름 목록으로 (FILL이면 전체)"""
+    if value is None:
+        return []
+    tokens = value.split() if isinstance(value, str) else [t for v in value for t in (v or "").split()]
+    lanes: List[str] = []
+    for token in tokens:
+        token = LANE_ALIASES.get(token.upper(), token.upper())
+        if token in FILL_LANES:
+            return list(LANES)
+        if token in LANES and token not in lanes:
+            lanes.append(token)
+    return lanes
+
+
+def lane_costs(main_lane: LaneInput, preferred_lanes: LaneInput = None,
+               off_role_penalty: float = OFF_ROLE_PENALTY) -> List[float]:
+    """LANES 순서의 라인별 비용 (라인 정보가 없는 플레이어는 어디든 선호 라인 비용)"""
+    main, preferred = parse_lanes(main_lane), parse_lanes(preferred_lanes)
+    if not main and not preferred:
+        return [PREFERRED_COST] * len(LANES)
+    return [0.0 if lane in main else PREFERRED_COST if lane in preferred else off_role_penalty for lane in LANES]
+
+
+def hungarian(cost: Sequence[Sequence[float]]) -> Tuple[float, List[int]]:
+    """행 수 <= 열 수인 비용 행렬의 최소 비용 배정 (헝가리안, O(n^2 m)) -> (비용, 행별 열 번호)"""
+    n, m = len(cost), len(cost[0])
+    inf = float("inf")
+    u, v = [0.0] * (n + 1), [0.0] * (m + 1)
+    match, way = [0] * (m + 1), [0] * (m + 1)   # match[j]: 열 j에 배정된 행 (1부터)
+    for i in range(1, n + 1):
+        match[0], j0 = i, 0
+        minv, used = [inf] * (m + 1), [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0, delta, j1 = match[j0], inf, 0
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = cost[i0 - 1][j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j], way[j] = cur, j0
+                    if minv[j] < delta:
+                        delta, j1 = minv[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+    assignment = [0] * n
+    for j in range(1, m + 1):
+        if match[j]:
+            assignment[match[j] - 1] = j - 1
+    return sum(cost[i][assignment[i]] for i in range(n)), assignment
+
+
+class LaneSplit(NamedTuple):
+    teams: List[List[int]]   # 팀별 플레이어 인덱스
+    roles: List[List[str]]   # teams와 같은 모양의 배정 라인
+    diff: float              # 점수 합 차이
+    lane_cost: float         # 두 팀 라인 배정 비용 합 (0이면 모두 주 라인)
+    objective: float         # diff + lane_weight * lane_cost
+    covered: bool            # 배정 결과 오프 라인(주/선호 라인이 아닌 곳)에 간 플레이어가 없는지
+    evaluated: int           # 라인 배정까지 계산한 분할 수
+    elapsed_ms: float
+
+
+class SplitOption(NamedTuple):
+    teams: List[List[int]]
+    roles: Optional[List[List[str]]]   # 라인 정보를 안 줬으면 None
+    diff: float
+    lane_cost: float
+    objective: float
+
+
+def _check_lobby(scores: Sequence[float], sizes: List[int], lanes: Optional[Sequence]):
+    if len(scores) > MATRIX_MAX_PLAYERS:
+        raise ValueError(f"at most {MATRIX_MAX_PLAYERS} players are supported.")
+    if lanes is not None:
+        if max(sizes) > len(LANES):
+            raise ValueError(f"lane-aware balance supports at most {len(LANES)} players per team.")
+        if len(lanes) != len(scores):
+            raise ValueError("lanes must have one entry per player.")
+
+
+def _playable(costs: List[List[float]], off_role_penalty: float) -> List[int]:
+    """플레이어별 주/선호 라인 비트마스크"""
+    return [sum(1 << j for j, c in enumerate(row) if c < off_role_penalty) for row in costs]
+
+
+def _covers(team: Sequence[int], playable: List[int]) -> bool:
+    """팀 전원을 서로 다른 주/선호 라인에 배정할 수 있는지 (플레이어-라인 이분 매칭)"""
+    owner: List[Optional[int]] = [None] * len(LANES)   # 라인별 배정된 플레이어
+
+    def augment(i: int, seen: int) -> bool:
+        for j in range(len(LANES)):
+            if playable[i] >> j & 1 and not seen >> j & 1:
+                seen |= 1 << j
+                if owner[j] is None or augment(owner[j], seen):
+                    owner[j] = i
+                    return True
+        return False
+
+    return all(augment(i, 0) for i in team)
+
+
+def _assign(costs: List[List[float]], team: Sequence[int], covered: bool,
+            off_role_penalty: float) -> Tuple[float, List[int]]:
+    """팀 라인 배정 -> (라인 비용, 팀원별 라인 번호)
+
+    covered면 오프 라인 칸에 어떤 배정 비용보다 큰 값을 더해서, 비용이 같은 오프 라인 배정 대신
+    반드시 모두 주/선호 라인인 배정 중 최소 비용을 고른다.
+    """
+    rows = [costs[i] for i in team]
+    if not covered:
+        return hungarian(rows)
+    bias = sum(max(row) for row in rows) + 1
+    _, assignment = hungarian([[c + bias if c >= off_role_penalty else c for c in row] for row in rows])
+    return sum(row[j] for row, j in zip(rows, assignment)), assignment
+
+
+def split_with_lanes(scores: Sequence[float], lanes: Sequence[Tuple[LaneInput, LaneInput]],
+                     team_size: Optional[int] = None, off_role_penalty: float = OFF_ROLE_PENALTY,
+                     lane_weight: float = LANE_WEIGHT) -> LaneSplit:
+    """점수 차이와 라인 적합도를 함께 보는 2팀 분할 + 팀별 라인 배정
+
+    lanes는 플레이어별 (주 라인, 선호 라인들). 분할을 점수 차이가 작은 순으로 보면서
+    팀원 모두를 주/선호 라인에 배정할 수 없는 팀이 있는 분할은 건너뛰고(그런 분할밖에 없으면 전체 허용),
+    남은 분할은 팀마다 헝가리안 배정으로 라인 비용을 구한다. 차이만으로 이미 현재 최선보다
+    나쁜 분할부터는 더 볼 필요가 없으므로 거기서 멈춘다.
+    """
+    started = time.perf_counter()
+    sizes = team_sizes(len(scores), 2, team_size)
+    _check_lobby(scores, sizes, lanes)
+    costs = [lane_costs(main, preferred, off_role_penalty) for main, preferred in lanes]
+    playable = _playable(costs, off_role_penalty)
+    table = evaluate_splits(scores, sizes[0])
+
+    best, evaluated = None, 0
+    for strict in (True, False):
+        for rank, diff in enumerate(table.diffs.tolist()):
+            if best is not None and diff >= best[0]:
+                break
+            teams = table.teams(rank)
+            covers = [_covers(team, playable) for team in teams]
+            if strict and not all(covers):
+                continue
+            evaluated += 1
+            assignments = [_assign(costs, team, c, off_role_penalty) for team, c in zip(teams, covers)]
+            lane_cost = sum(c for c, _ in assignments)
+            objective = diff + lane_weight * lane_cost
+            if best is None or objective < best[0]:
+                best = (objective, diff, lane_cost, teams, [a for _, a in assignments], all(covers))
+        if best is not None:
+            break
+
+    objective, diff, lane_cost, teams, assignments, covered = best
+    return LaneSplit(
+        teams=teams, roles=[[LANES[j] for j in assignment] for assignment in assignments],
+        diff=diff, lane_cost=lane_cost, objective=objective, covered=covered, evaluated=evaluated,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
+
+
+def top_splits(scores: Sequence[float], k: int = 5, lanes: Optional[Sequence[Tuple[LaneInput, LaneInput]]] = None,
+               team_size: Optional[int] = None, off_role_penalty: float = OFF_ROLE_PENALTY,
+               lane_weight: float = LANE_WEIGHT, swap_tolerance: float = SWAP_TOLERANCE) -> List[SplitOption]:
+    """목적값(diff + lane_weight * lane_cost)이 작은 서로 다른 2팀 분할 k개
+
+    분할을 정렬하지 않고 한 번 훑으면서 크기 k의 힙만 유지한다. 힙이 차 있으면 점수 차이만으로
+    힙의 가장 나쁜 값보다 나쁜 분할은 라인 배정도 하지 않고 넘기므로, k=20도 k=1과 비용이 비슷하다.
+    이미 고른 분할과 점수가 비슷한(swap_tolerance 이하) 두 명만 맞바꾼 분할은 둘 중 나은 쪽만 남긴다.
+    라인 정보(lanes)를 주면 팀원 모두를 주/선호 라인에 배정할 수 없는 분할은 다른 후보가 모자랄 때만 쓴다.
+    """
+    sizes = team_sizes(len(scores), 2, team_size)
+    _check_lobby(scores, sizes, lanes)
+    n = len(scores)
+    matrix = membership_matrix(n, sizes[0])
+    diffs = np.abs(matrix @ np.asarray(scores, dtype=float)).tolist()
+    team_masks = ((matrix > 0) @ (1 << np.arange(n))).tolist()
+    costs = [lane_costs(main, preferred, off_role_penalty) for main, preferred in lanes] if lanes else None
+    playable = _playable(costs, off_role_penalty) if costs else None
+    full = (1 << n) - 1
+
+    def members(mask: int) -> List[int]:
+        return [i for i in range(n) if mask >> i & 1]
+
+    def near_duplicate(a: int, b: int) -> bool:
+        # 인원이 같으면 0번이 늘 첫 팀이므로, 0번이 낀 맞교환은 b의 두 팀을 바꿔 봐야 두 명 차이로 보임
+        for other in (b, full ^ b) if sizes[0] == sizes[1] else (b,):
+            moved = a ^ other
+            if bin(moved).count("1") == 2:
+                i, j = (moved & -moved).bit_length() - 1, moved.bit_length() - 1
+                return abs(scores[i] - scores[j]) <= swap_tolerance
+        return False
+
+    def covered(mask: int) -> bool:
+        return _covers(members(mask), playable) and _covers(members(full ^ mask), playable)
+
+    def select(rows: List[int], limit: int, kept: Sequence[int] = ()) -> List[Tuple[float, int, Optional[List]]]:
+        heap: List[Tuple[float, int, int, Optional[List]]] = []   # (-목적값, -행, 마스크, 라인 배정)
+        for row in rows:
+            diff = diffs[row]
+            if len(heap) >= limit and diff >= -heap[0][0]:
+                continue
+            mask = team_masks[row]
+            if any(near_duplicate(m, mask) for m in kept):   # 앞 단계에서 고른 분할과 사실상 같음
+                continue
+            assignments, objective = None, diff
+            if costs:
+                assignments = [_assign(costs, team, _covers(team, playable), off_role_penalty)
+                               for team in (members(mask), members(full ^ mask))]
+                objective += lane_weight * sum(c for c, _ in assignments)
+            if len(heap) >= limit and objective >= -heap[0][0]:
+                continue
+            duplicates = [entry for entry in heap if near_duplicate(entry[2], mask)]
+            if any(-entry[0] <= objective for entry in duplicates):
+                continue
+            if duplicates:
+                for entry in duplicates:
+                    heap.remove(entry)
+                heapq.heapify(heap)
+            heapq.heappush(heap, (-objective, -row, mask, assignments))
+            if len(heap) > limit:
+                heapq.heappop(heap)
+        return sorted((-o, mask, a) for o, _, mask, a in heap)
+
+    rows = range(len(diffs))
+    if playable is None:
+        picked = select(list(rows), k)
+    else:
+        picked = select([r for r in rows if covered(team_masks[r])], k)
+        if len(picked) < k:
+            chosen = [mask for _, mask, _ in picked]
+            taken = set(chosen)
+            picked += select([r for r in rows if team_masks[r] not in taken], k - len(picked), kept=chosen)
+            # 첫 단계 힙에서 중복으로 밀려난 분할이 둘째 단계에 나올 수 있으므로 라인을 채우는 분할을 앞으로
+            picked.sort(key=lambda p: (not covered(p[1]), p[0]))
+
+    options = []
+    for objective, mask, assignments in picked:
+        teams = [members(mask), members(full ^ mask)]
+        diff = abs(sum(scores[i] for i in teams[0]) - sum(scores[i] for i in teams[1]))
+        options.append(SplitOption(
+            teams=teams,
+            roles=[[LANES[j] for j in a] for _, a in assignments] if assignments else None,
+            diff=diff, lane_cost=sum(c for c, _ in assignments) if assignments else 0.0, objective=objective,
+        ))
+    return options
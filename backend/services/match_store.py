@@ -0,0 +1,190 @@
+import os
+import json
+import lzma
+import threading
+import time
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Set
+from .storage import connect, data_path
+
+MATCH_STORE_PATH = os.getenv("MATCH_STORE_PATH") or data_path("riot_matches.db")
+MATCH_STORE_CODEC = os.getenv("MATCH_STORE_CODEC", "zlib")  # zlib | lzma
+
+_CODECS = {
+    "zlib": (lambda b: zlib.compress(b, 6), zlib.decompress),
+    "lzma": (lzma.compress, lzma.decompress),
+}
+
+
+def project_match(match: Dict[str, Any]) -> Dict[str, Any]:
+    """match-v5 응답에서 밸런싱에 필요한 필드만 남긴 요약 (원본과 같은 구조 유지)"""
+    info = match.get("info", {})
+    return {
+        "metadata": {"matchId": match.get("metadata", {}).get("matchId")},
+        "info": {
+            "queueId": info.get("queueId"),
+            "gameCreation": info.get("gameCreation"),
+            "gameEndTimestamp": info.get("gameEndTimestamp"),
+            "participants": [
+                {
+                    "puuid": p.get("puuid"),
+                    "win": p.get("win"),
+                    "championId": p.get("championId"),
+                    "championName": p.get("championName"),
+                    "teamPosition": p.get("teamPosition"),
+                    "teamId": p.get("teamId"),
+                }
+                for p in info.get("participants", [])
+            ],
+        },
+    }
+
+
+class MatchStore:
+    """종료된 매치는 바뀌지 않으므로 한 번만 저장하는 match-v5 저장소
+
+    원본은 압축해서 보관하고, 조회는 요약(projection) 컬럼만 읽는다.
+    """
+
+    def __init__(self, path: str = MATCH_STORE_PATH, codec: str = MATCH_STORE_CODEC):
+        if codec not in _CODECS:
+            raise ValueError(f"Unknown match store codec: {codec}")
+        self.path = path
+        self.codec = codec
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = connect(self.path)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS riot_matches (
+                    matchId TEXT PRIMARY KEY,
+                    queueId INTEGER,
+                    gameEndTimestamp INTEGER,
+                    projection TEXT NOT NULL,
+                    codec TEXT NOT NULL,
+                    raw BLOB NOT NULL
+                )
+            """)
+            # 플레이어별 로컬 매치 기록 + 마지막으로 받아온 매치 종료 시각(ms)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS riot_match_history (
+                    puuid TEXT NOT NULL,
+                    matchId TEXT NOT NULL,
+                    gameEndTimestamp INTEGER,
+                    PRIMARY KEY (puuid, matchId)
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_riot_match_history_time ON riot_match_history (puuid, gameEndTimestamp)"
+            )
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS riot_sync_cursors (
+                    puuid TEXT PRIMARY KEY,
+                    lastEndTimestamp INTEGER NOT NULL,
+                    syncedAt REAL NOT NULL
+                )
+            """)
+        return self._conn
+
+    def get(self, match_id: str) -> Optional[Dict[str, Any]]:
+        """저장된 매치 요약 (없으면 None)"""
+        with self._lock:
+            row = self._db().execute("SELECT projection FROM riot_matches WHERE matchId = ?", (match_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_raw(self, match_id: str) -> Optional[Dict[str, Any]]:
+        """저장된 원본 match-v5 응답 (없으면 None)"""
+        with self._lock:
+            row = self._db().execute("SELECT codec, raw FROM riot_matches WHERE matchId = ?", (match_id,)).fetchone()
+        if not row:
+            return None
+        return json.loads(_CODECS[row[0]][1](row[1]))
+
+    def put(self, match_id: str, match: Dict[str, Any]) -> Dict[str, Any]:
+        """원본을 압축 저장하고 요약 반환 (이미 있으면 덮어쓰지 않음)"""
+        projection = project_match(match)
+        raw = _CODECS[self.codec][0](json.dumps(match, separators=(",", ":")).encode())
+        with self._lock:
+            self._db().execute(
+                "INSERT OR IGNORE INTO riot_matches (matchId, queueId, gameEndTimestamp, projection, codec, raw) VALUES (?, ?, ?, ?, ?, ?)",
+                (match_id, projection["info"]["queueId"], projection["info"]["gameEndTimestamp"],
+                 json.dumps(projection, separators=(",", ":")), self.codec, raw)
+            )
+        return projection
+
+    def sync_cursor(self, puuid: str) -> Optional[int]:
+        """이 플레이어에 대해 이미 받아온 가장 최근 매치의 종료 시각(ms)"""
+        with self._lock:
+            row = self._db().execute(
+                "SELECT lastEndTimestamp FROM riot_sync_cursors WHERE puuid = ?", (puuid,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def history_size(self, puuid: str) -> int:
+        with self._lock:
+            return self._db().execute(
+                "SELECT COUNT(*) FROM riot_match_history WHERE puuid = ?", (puuid,)
+            ).fetchone()[0]
+
+    def known_ids(self, puuid: str, match_ids: Iterable[str]) -> Set[str]:
+        """match_ids 중 이미 이 플레이어의 기록에 있는 것"""
+        match_ids = list(match_ids)
+        if not match_ids:
+            return set()
+        marks = ",".join("?" * len(match_ids))
+        with self._lock:
+            rows = self._db().execute(
+                f"SELECT matchId FROM riot_match_history WHERE puuid = ? AND matchId IN ({marks})",
+                (puuid, *match_ids)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def add_history(self, puuid: str, matches: Iterable[Dict[str, Any]], advance_cursor: bool = True):
+        """받아온 매치 요약을 플레이어 기록에 합치고 커서를 가장 최근 종료 시각으로 옮김
+
+        중간에 실패한 매치가 있으면 advance_cursor=False로 불러 다음 동기화 때 다시 받게 한다.
+        """
+        rows = []
+        for m in matches:
+            info = m.get("info", {})
+            end = info.get("gameEndTimestamp") or info.get("gameCreation")
+            rows.append((puuid, m.get("metadata", {}).get("matchId"), end))
+        with self._lock:
+            db = self._db()
+            db.executemany(
+                "INSERT OR IGNORE INTO riot_match_history (puuid, matchId, gameEndTimestamp) VALUES (?, ?, ?)", rows
+            )
+            if advance_cursor:
+                db.execute("""
+                    INSERT INTO riot_sync_cursors (puuid, lastEndTimestamp, syncedAt)
+                    SELECT ?, COALESCE(MAX(gameEndTimestamp), 0), ? FROM riot_match_history WHERE puuid = ?
+                    ON CONFLICT(puuid) DO UPDATE SET lastEndTimestamp = excluded.lastEndTimestamp, syncedAt = excluded.syncedAt
+                """, (puuid, time.time(), puuid))
+
+    def history(self, puuid: str, limit: int) -> List[Dict[str, Any]]:
+        """로컬에 쌓인 이 플레이어의 최근 매치 요약 (최신순)"""
+        with self._lock:
+            rows = self._db().execute("""
+                SELECT m.projection FROM riot_match_history h
+                JOIN riot_matches m ON m.matchId = h.matchId
+                WHERE h.puuid = ?
+                ORDER BY h.gameEndTimestamp DESC
+                LIMIT ?
+            """, (puuid, limit)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            db = self._db()
+            count, raw_bytes, proj_bytes = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(raw)), 0), COALESCE(SUM(LENGTH(projection)), 0) FROM riot_matches"
+            ).fetchone()
+            players = db.execute("SELECT COUNT(*) FROM riot_sync_cursors").fetchone()[0]
+        return {"matches": count, "rawBytes": raw_bytes, "projectionBytes": proj_bytes, "codec": self.codec,
+                "syncedPlayers": players}
+
+
+# 전역 인스턴스
+match_store = MatchStore()
@@ -0,0 +1,166 @@
+import os
+import math
+import time
+import random
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+from .balance import membership_matrix, split_teams
+
+LOBBY_SIZE = 10
+MODES = ("similar", "stratified")   # 로비끼리 평균 실력을 맞춤 / 실력대별로 나눔
+BENCH_MODES = ("latest", "auto")    # 늦게 신청한 순서로 대기 / 탐색이 대기 인원도 고름
+
+# 로비 나누기 탐색 시간(초)과 동시에 돌리는 독립 탐색(프로세스) 수, 0이면 프로세스 풀 없이 한 번만
+MULTI_LOBBY_TIME_BUDGET = float(os.getenv("MULTI_LOBBY_TIME_BUDGET", "1.0"))
+MULTI_LOBBY_WORKERS = int(os.getenv("MULTI_LOBBY_WORKERS", str(min(4, os.cpu_count() or 1))))
+# 로비 간 항목(평균 차이 / 로비 내 실력 폭)을 팀 점수 차이 몇 배로 볼지
+LOBBY_SPREAD_WEIGHT = 1.0
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+class Lobby(NamedTuple):
+    players: List[int]
+    teams: List[List[int]]   # 로비 안의 5:5 분할 (플레이어 인덱스)
+    diff: float
+    average: float
+
+
+class LobbyPlan(NamedTuple):
+    lobbies: List[Lobby]
+    bench: List[int]
+    objective: float
+    mode: str
+    restarts: int
+    elapsed_ms: float
+
+
+def _lobby_cost(scores: np.ndarray, members: List[int]) -> float:
+    """로비 안에서 가장 잘 나눈 5:5의 점수 합 차이"""
+    return float(np.abs(membership_matrix(LOBBY_SIZE) @ scores[members]).min())
+
+
+def _spread_cost(scores: np.ndarray, groups: List[List[int]], mode: str) -> float:
+    # similar: 로비 평균의 최대-최소, stratified: 로비마다 실력 표준편차 합 (팀 합 단위로 환산)
+    if mode == "similar":
+        averages = [scores[g].mean() for g in groups]
+        return (max(averages) - min(averages)) * LOBBY_SIZE / 2
+    return sum(float(scores[g].std()) for g in groups) * LOBBY_SIZE / 2
+
+
+def _initial(scores: np.ndarray, players: List[int], lobbies: int, mode: str) -> List[List[int]]:
+    ranked = sorted(players, key=lambda i: -scores[i])
+    if mode == "stratified":
+        return [ranked[l * LOBBY_SIZE:(l + 1) * LOBBY_SIZE] for l in range(lobbies)]
+    groups: List[List[int]] = [[] for _ in range(lobbies)]
+    for n, i in enumerate(ranked):   # 스네이크 드래프트
+        lap, pos = divmod(n, lobbies)
+        groups[pos if lap % 2 == 0 else lobbies - 1 - pos].append(i)
+    return groups
+
+
+def anneal(scores: Sequence[float], lobbies: int, bench: List[int], mode: str, bench_auto: bool,
+           time_budget: float, seed: int) -> Tuple[float, List[List[int]], List[int]]:
+    """로비 간 1:1 맞교환(bench_auto면 대기 인원과도)으로 하는 시뮬레이티드 어닐링 -> (목적값, 로비들, 대기)
+
+    목적값 = 로비별 최선 5:5 차이의 합 + LOBBY_SPREAD_WEIGHT * 로비 간 항목.
+    프로세스 풀에서 seed만 바꿔 여러 번 돌리므로 모듈 최상위 함수로 둔다.
+    """
+    rng = random.Random(seed)
+    values = np.asarray(scores, dtype=float)
+    benched = list(bench)   # bench_auto면 시작점일 뿐 탐색 중에 바뀜
+    groups = _initial(values, [i for i in range(len(scores)) if i not in set(benched)], lobbies, mode)
+    if seed:
+        # 첫 탐색 말고는 무작위 맞교환 몇 번으로 시작점을 흔듦
+        for _ in range(lobbies * LOBBY_SIZE):
+            a, b = rng.sample(range(lobbies), 2)
+            x, y = rng.randrange(LOBBY_SIZE), rng.randrange(LOBBY_SIZE)
+            groups[a][x], groups[b][y] = groups[b][y], groups[a][x]
+
+    costs = [_lobby_cost(values, g) for g in groups]
+    current = sum(costs) + LOBBY_SPREAD_WEIGHT * _spread_cost(values, groups, mode)
+    best = (current, [list(g) for g in groups], list(benched))
+    start_temp = max(float(values.std()), 1.0)
+    started = time.perf_counter()
+    deadline = started + time_budget
+    pools = groups + ([benched] if benched and bench_auto else [])
+
+    while len(pools) > 1:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        temp = start_temp * (1e-3 ** ((now - started) / time_budget))   # 시간에 따라 기하급수적으로 냉각
+        for _ in range(200):
+            a, b = rng.sample(range(len(pools)), 2)
+            x, y = rng.randrange(len(pools[a])), rng.randrange(len(pools[b]))
+            pools[a][x], pools[b][y] = pools[b][y], pools[a][x]
+            new_costs = list(costs)
+            for g in (a, b):
+                if g < lobbies:
+                    new_costs[g] = _lobby_cost(values, pools[g])
+            candidate = sum(new_costs) + LOBBY_SPREAD_WEIGHT * _spread_cost(values, pools[:lobbies], mode)
+            delta = candidate - current
+            if delta <= 0 or rng.random() < math.exp(-delta / temp):
+                current, costs = candidate, new_costs
+                if current < best[0]:
+                    best = (current, [list(g) for g in pools[:lobbies]], list(pools[lobbies]) if len(pools) > lobbies else list(benched))
+            else:
+                pools[a][x], pools[b][y] = pools[b][y], pools[a][x]
+    return float(best[0]), best[1], best[2]
+
+
+def _pool_executor() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=MULTI_LOBBY_WORKERS)
+    return _pool
+
+
+def shutdown_pool():
+    """앱 종료 시 프로세스 풀 정리"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def plan_lobbies(scores: Sequence[float], mode: str = "similar", bench: str = "latest",
+                       time_budget: float = MULTI_LOBBY_TIME_BUDGET) -> LobbyPlan:
+    """N명을 ⌊N/10⌋개 로비와 대기 인원으로 나누고 로비마다 5:5로 나눔
+
+    bench="latest"면 뒤에 신청한 N % 10명이 대기, "auto"면 탐색이 대기 인원도 고른다.
+    워커마다 다른 시작점으로 time_budget초씩 어닐링해서 가장 좋은 결과를 쓴다.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}.")
+    if bench not in BENCH_MODES:
+        raise ValueError(f"bench must be one of {BENCH_MODES}.")
+    lobbies = len(scores) // LOBBY_SIZE
+    if lobbies < 1:
+        raise ValueError(f"at least {LOBBY_SIZE} players are needed.")
+    started = time.perf_counter()
+    late = list(range(lobbies * LOBBY_SIZE, len(scores)))
+    args = (list(scores), lobbies, late, mode, bench == "auto", time_budget)
+
+    loop = asyncio.get_running_loop()
+    if MULTI_LOBBY_WORKERS > 0 and lobbies > 1:
+        executor = _pool_executor()
+        runs = await asyncio.gather(*[loop.run_in_executor(executor, anneal, *args, seed)
+                                      for seed in range(MULTI_LOBBY_WORKERS)])
+    else:
+        runs = [await loop.run_in_executor(None, anneal, *args, 0)]
+    objective, groups, benched = min(runs, key=lambda r: r[0])
+
+    result = []
+    for group in sorted(groups, key=lambda g: -sum(scores[i] for i in g)):
+        split = split_teams([scores[i] for i in group], teams=2, team_size=LOBBY_SIZE // 2)
+        result.append(Lobby(
+            players=sorted(group), teams=[[group[i] for i in team] for team in split.teams],
+            diff=split.diff, average=sum(scores[i] for i in group) / len(group),
+        ))
+    return LobbyPlan(
+        lobbies=result, bench=sorted(benched), objective=objective, mode=mode, restarts=len(runs),
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 3),
+    )
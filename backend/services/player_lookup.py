@@ -0,0 +1,93 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+StageFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class StageSkipped(Exception):
+    """의존 단계의 결과가 없어서 실행하지 않은 단계"""
+
+
+class LookupResult:
+    def __init__(self, values: Dict[str, Any], timings: Dict[str, float]):
+        self.values = values
+        self.timings = timings  # 단계별 소요 시간(ms)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """단계 결과 (실패/건너뜀이면 default)"""
+        value = self.values.get(name)
+        return default if value is None or isinstance(value, Exception) else value
+
+    def require(self, name: str) -> Any:
+        """단계 결과 (실패했으면 그 예외를 다시 발생)"""
+        value = self.values.get(name)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+
+class LookupGraph:
+    """플레이어 조회용 의존성 그래프
+
+    각 단계는 의존 단계가 끝나는 즉시 시작하므로 서로 독립인 호출은 동시에 진행된다.
+    의존 단계가 실패하면 같은 예외를, None을 돌려주면 StageSkipped를 결과로 남기고 건너뛴다.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, tuple] = {}
+
+    def stage(self, name: str, fn: StageFn, deps: Iterable[str] = ()) -> "LookupGraph":
+        self.stages[name] = (tuple(deps), fn)
+        return self
+
+    async def run(self, **inputs: Any) -> LookupResult:
+        values: Dict[str, Any] = dict(inputs)
+        timings: Dict[str, float] = {}
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def run_stage(name: str):
+            deps, fn = self.stages[name]
+            for dep in deps:
+                if dep in tasks:
+                    await tasks[dep]
+                dep_value = values.get(dep)
+                if isinstance(dep_value, Exception):
+                    values[name] = dep_value  # 원래 실패 원인을 그대로 전달
+                    return
+                if dep_value is None:
+                    values[name] = StageSkipped(dep)
+                    return
+            started = time.perf_counter()
+            try:
+                values[name] = await fn(values)
+            except Exception as e:
+                values[name] = e
+            timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+        for name in self.stages:
+            tasks[name] = asyncio.ensure_future(run_stage(name))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        return LookupResult(values, timings)
+
+
+def build_player_lookup(
+    account: StageFn,
+    league: Optional[StageFn] = None,
+    mastery: Optional[StageFn] = None,
+    match_ids: Optional[StageFn] = None,
+    summoner: Optional[StageFn] = None,
+) -> LookupGraph:
+    """PUUID 기준 조회 그래프: account(Riot ID → PUUID) 다음 나머지 단계가 모두 동시에 실행
+
+    리그/숙련도/매치는 by-puuid 경로를 쓰므로 소환사 조회는 레벨/아이콘이 필요할 때만 넣는다.
+    """
+    graph = LookupGraph().stage("account", account)
+    for name, fn in (("league", league), ("mastery", mastery), ("match_ids", match_ids), ("summoner", summoner)):
+        if fn:
+            graph.stage(name, fn, deps=["account"])
+    return graph
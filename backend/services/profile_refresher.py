@@ -0,0 +1,191 @@
+import os
+import json
+import time
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from .storage import sqlite3
+from .riot_id import split_riot_id
+from .riot_scheduler import use_priority
+from .riot_metrics import use_feature
+
+PROFILE_STALE_AFTER = int(os.getenv("RIOT_PROFILE_STALE_AFTER", "1800"))
+PROFILE_ACTIVE_DAYS = int(os.getenv("RIOT_PROFILE_ACTIVE_DAYS", "14"))
+PROFILE_REFRESH_INTERVAL = int(os.getenv("RIOT_PROFILE_REFRESH_INTERVAL", "60"))
+PROFILE_REFRESH_BATCH = int(os.getenv("RIOT_PROFILE_REFRESH_BATCH", "10"))
+# stale 되기 전에 미리 갱신을 시작하는 비율 (0.8 = TTL의 80%가 지나면 갱신 대상)
+PROFILE_REFRESH_AHEAD = 0.8
+
+FetchProfile = Callable[[str, str], Awaitable[Optional[Dict]]]
+
+
+class ProfileRefresher:
+    """최근 내전에 참가한 플레이어의 라이엇 프로필을 미리 갱신해 두는 백그라운드 스케줄러
+
+    조회는 항상 저장된 프로필을 바로 돌려주고, 오래된 경우에만 비동기로 갱신한다
+    (stale-while-revalidate).
+    """
+
+    def __init__(self, db_path: str, fetch: FetchProfile, stale_after: int = PROFILE_STALE_AFTER,
+                 active_days: int = PROFILE_ACTIVE_DAYS, interval: int = PROFILE_REFRESH_INTERVAL,
+                 batch: int = PROFILE_REFRESH_BATCH):
+        self.db_path = db_path
+        self.fetch = fetch
+        self.stale_after = stale_after
+        self.active_days = active_days
+        self.interval = interval
+        self.batch = batch
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._failed_at: Dict[str, float] = {}
+        self.refreshed = 0
+        self.failed = 0
+
+    def init_db(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            # 이름 기준이던 예전 테이블은 캐시일 뿐이므로 PUUID 기준으로 다시 만든다
+            pk = [row[1] for row in conn.execute("PRAGMA table_info(riot_profiles)") if row[5]]
+            if pk and pk != ["puuid"]:
+                conn.execute("DROP TABLE riot_profiles")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS riot_profiles (
+                    puuid TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    profile TEXT NOT NULL,
+                    refreshedAt REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_riot_profiles_name ON riot_profiles (name)")
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _load(self, name: str) -> Optional[Tuple[Dict, float]]:
+        # players.puuid가 있으면 PUUID로, 아직 모르면 Riot ID로 찾는다
+        conn = sqlite3.connect(self.db_path)
+        try:
+            row = conn.execute("""
+                SELECT profile, refreshedAt FROM riot_profiles
+                WHERE puuid = (SELECT puuid FROM players WHERE name = ?) OR name = ?
+                ORDER BY refreshedAt DESC LIMIT 1
+            """, (name, name)).fetchone()
+        finally:
+            conn.close()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def _save(self, name: str, profile: Dict):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO riot_profiles (puuid, name, profile, refreshedAt) VALUES (?, ?, ?, ?)",
+                (profile["puuid"], name, json.dumps(profile, ensure_ascii=False), time.time())
+            )
+            conn.execute("UPDATE players SET puuid = ? WHERE name = ?", (profile["puuid"], name))
+            conn.commit()
+        finally:
+            conn.close()
+
+    async def refresh(self, name: str, priority: str = "interactive") -> Optional[Dict]:
+        """라이엇 API로 프로필을 다시 받아 저장 (같은 플레이어 갱신은 하나만 진행)"""
+        task = self._refreshing.get(name)
+        if task is None:
+            with use_priority(priority):
+                task = asyncio.ensure_future(self._refresh(name))
+            self._refreshing[name] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(name, None))
+        return await asyncio.shield(task)
+
+    async def _refresh(self, name: str) -> Optional[Dict]:
+        riot_id = split_riot_id(name)
+        if not riot_id:
+            return None
+        try:
+            profile = await self.fetch(*riot_id)
+        except Exception as e:
+            print(f"프로필 갱신 실패 ({name}): {e}")
+            profile = None
+        if not profile:
+            self.failed += 1
+            self._failed_at[name] = time.time()
+            return None
+        self._failed_at.pop(name, None)
+        profile["refreshedAt"] = time.time()
+        self._save(name, profile)
+        self.refreshed += 1
+        return profile
+
+    async def get(self, name: str) -> Optional[Dict]:
+        """저장된 프로필을 즉시 반환하고, 오래됐으면 백그라운드 갱신만 예약
+
+        저장된 프로필이 없을 때만 라이엇 API 응답을 기다린다.
+        """
+        cached = self._load(name)
+        if cached is None:
+            profile = await self.refresh(name)
+            if profile:
+                profile = dict(profile, stale=False)
+            return profile
+        profile, refreshed_at = cached
+        profile["stale"] = time.time() - refreshed_at > self.stale_after
+        if profile["stale"] and name not in self._refreshing:
+            asyncio.ensure_future(self.refresh(name, priority="background"))
+        return profile
+
+    def due_players(self) -> List[str]:
+        """최근 N일 내전 참가자 중 갱신이 필요한 플레이어 (한 번도 안 받은 순 → 오래된 순)"""
+        threshold = time.time() - self.stale_after * PROFILE_REFRESH_AHEAD
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute("""
+                SELECT p.name, MAX(rp.refreshedAt) AS refreshedAt
+                FROM players p
+                JOIN participants pa ON p.id = pa.playerId
+                JOIN matches m ON m.id = pa.matchId
+                LEFT JOIN riot_profiles rp ON rp.puuid = p.puuid
+                WHERE datetime(m.createdAt) > datetime('now', ?, '+9 hours')
+                GROUP BY p.name
+                HAVING refreshedAt IS NULL OR refreshedAt < ?
+                ORDER BY refreshedAt IS NOT NULL, refreshedAt
+                LIMIT ?
+            """, (f"-{self.active_days} days", threshold, self.batch)).fetchall()
+        finally:
+            conn.close()
+        return [row[0] for row in rows]
+
+    async def run_once(self) -> int:
+        now = time.time()
+        # 최근에 실패한 플레이어는 한동안 건너뛰어 다른 플레이어 갱신을 막지 않게 함
+        names = [n for n in self.due_players()
+                 if split_riot_id(n) and now - self._failed_at.get(n, 0) > self.stale_after]
+        for name in names:
+            # 우선순위 순서대로 하나씩, 백그라운드 클래스로 (대화형 요청의 레이트 리밋 여유를 남겨둠)
+            with use_feature("profile-refresh"):
+                await self.refresh(name, priority="background")
+        return len(names)
+
+    async def _loop(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"프로필 갱신 스케줄러 오류: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.init_db()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {"refreshed": self.refreshed, "failed": self.failed, "inflight": len(self._refreshing)}
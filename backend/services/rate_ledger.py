@@ -0,0 +1,130 @@
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+from .storage import connect, data_path
+
+RATE_LEDGER_PATH = os.getenv("RIOT_RATE_LEDGER_PATH") or data_path("riot_rate_ledger.db")
+
+# (capacity, window, tokens, updated) - updated는 프로세스끼리 비교할 수 있게 벽시계(time.time) 기준
+BucketRow = Tuple[int, int, float, float]
+
+
+class RateLedger:
+    """같은 서버의 여러 워커 프로세스가 함께 쓰는 라이엇 한도 장부 (WAL sqlite)
+
+    토큰 버킷 상태와 429 백오프 시각을 파일 하나에 두고, 읽고-차감하는 과정은
+    BEGIN IMMEDIATE 트랜잭션으로 직렬화해서 N개 워커가 하나의 앱 한도를 나눠 쓴다.
+    트랜잭션은 다른 워커를 기다리며 막힐 수 있으므로 이벤트 루프 밖(스레드)에서 부르고,
+    조회는 WAL 덕분에 쓰기를 기다리지 않는 별도 연결로 한다.
+    """
+
+    def __init__(self, path: str = RATE_LEDGER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._conn = None
+        self._read_conn = None
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = connect(self.path)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS riot_rate_buckets (
+                    scope TEXT NOT NULL,
+                    window INTEGER NOT NULL,
+                    capacity INTEGER NOT NULL,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    PRIMARY KEY (scope, window)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS riot_backoff (
+                    host TEXT NOT NULL,
+                    method TEXT NOT NULL,
+                    until REAL NOT NULL,
+                    PRIMARY KEY (host, method)
+                )
+            """)
+        return self._conn
+
+    def _reader(self):
+        if self._read_conn is None:
+            with self._lock:
+                self._db()   # 테이블 생성
+            self._read_conn = connect(self.path)
+        return self._read_conn
+
+    @contextmanager
+    def transaction(self):
+        """다른 프로세스의 쓰기를 막는 트랜잭션 (이 안에서 load/save)"""
+        with self._lock:
+            db = self._db()
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    @staticmethod
+    def load(db, scope: str) -> List[BucketRow]:
+        return db.execute(
+            "SELECT capacity, window, tokens, updated FROM riot_rate_buckets WHERE scope = ? ORDER BY window",
+            (scope,)
+        ).fetchall()
+
+    @staticmethod
+    def insert_missing(db, scope: str, rows: List[BucketRow]):
+        """scope에 아직 없는 창만 추가 (있는 창은 그대로)"""
+        db.executemany(
+            "INSERT OR IGNORE INTO riot_rate_buckets (scope, window, capacity, tokens, updated) VALUES (?, ?, ?, ?, ?)",
+            [(scope, window, capacity, tokens, updated) for capacity, window, tokens, updated in rows]
+        )
+
+    @staticmethod
+    def save(db, scope: str, rows: List[BucketRow]):
+        db.execute("DELETE FROM riot_rate_buckets WHERE scope = ?", (scope,))
+        db.executemany(
+            "INSERT INTO riot_rate_buckets (scope, window, capacity, tokens, updated) VALUES (?, ?, ?, ?, ?)",
+            [(scope, window, capacity, tokens, updated) for capacity, window, tokens, updated in rows]
+        )
+
+    def scopes(self, prefix: str = "") -> Dict[str, List[BucketRow]]:
+        with self._read_lock:
+            rows = self._reader().execute(
+                "SELECT scope, capacity, window, tokens, updated FROM riot_rate_buckets WHERE scope LIKE ? ORDER BY scope, window",
+                (prefix + "%",)
+            ).fetchall()
+        result: Dict[str, List[BucketRow]] = {}
+        for scope, *row in rows:
+            result.setdefault(scope, []).append(tuple(row))
+        return result
+
+    def block(self, host: str, method: str, until: float):
+        """host/method를 until(벽시계)까지 멈춤 (method가 ""면 호스트 전체)"""
+        with self._lock:
+            self._db().execute("""
+                INSERT INTO riot_backoff (host, method, until) VALUES (?, ?, ?)
+                ON CONFLICT(host, method) DO UPDATE SET until = MAX(until, excluded.until)
+            """, (host, method, until))
+
+    def blocked_until(self, host: str, method: str) -> float:
+        with self._read_lock:
+            row = self._reader().execute(
+                "SELECT MAX(until) FROM riot_backoff WHERE host = ? AND method IN ('', ?)", (host, method)
+            ).fetchone()
+        return row[0] or 0.0
+
+    def blocks(self) -> Dict[Tuple[str, str], float]:
+        now = time.time()
+        with self._read_lock:
+            rows = self._reader().execute("SELECT host, method, until FROM riot_backoff WHERE until > ?", (now,)).fetchall()
+        return {(host, method): until for host, method, until in rows}
+
+
+# 전역 인스턴스
+rate_ledger = RateLedger()
@@ -0,0 +1,290 @@
+import os
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from .rate_ledger import RateLedger, rate_ledger
+
+# 라이엇 기본 앱 한도 (개인 키 기준, 응답 헤더를 받으면 그 값으로 교체)
+DEFAULT_APP_LIMITS = [(20, 1), (100, 120)]
+# 여러 워커가 한 서버에서 돌 때 한도를 함께 지키도록 sqlite 장부 사용 (0이면 프로세스별 메모리)
+SHARED_RATE_LIMIT = os.getenv("RIOT_SHARED_RATE_LIMIT", "1") != "0"
+
+
+def parse_rate_limit_header(value: Optional[str]) -> List[Tuple[int, int]]:
+    """'20:1,100:120' 형식의 헤더를 [(limit, window)]로 변환"""
+    windows = []
+    for part in (value or "").split(","):
+        limit, _, window = part.strip().partition(":")
+        if limit.isdigit() and window.isdigit():
+            windows.append((int(limit), int(window)))
+    return windows
+
+
+class TokenBucket:
+    """window초 동안 limit개를 허용하는 토큰 버킷"""
+
+    clock = staticmethod(time.monotonic)
+
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self.tokens = float(limit)
+        self.updated = self.clock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.limit, self.tokens + (now - self.updated) * self.limit / self.window)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) * self.window / self.limit
+
+    def take(self):
+        self.tokens -= 1
+
+    def resize(self, limit: int, window: int):
+        # 남은 비율을 유지한 채 한도 변경
+        self._refill(self.clock())
+        ratio = self.tokens / self.limit if self.limit else 0
+        self.limit, self.window = limit, window
+        self.tokens = ratio * limit
+
+    def sync_count(self, count: int):
+        # 서버가 알려준 사용량이 더 많으면 그쪽을 따른다
+        self.tokens = min(self.tokens, float(self.limit - count))
+
+    def snapshot(self) -> Dict:
+        self._refill(self.clock())
+        return {"limit": self.limit, "window": self.window, "remaining": int(max(self.tokens, 0))}
+
+
+def _resize_buckets(buckets: List[TokenBucket], windows: Iterable[Tuple[int, int]],
+                    bucket_cls: type = TokenBucket) -> List[TokenBucket]:
+    by_window = {b.window: b for b in buckets}
+    resized = []
+    for limit, window in windows:
+        bucket = by_window.get(window)
+        if bucket is None:
+            bucket = bucket_cls(limit, window)
+        elif bucket.limit != limit:
+            bucket.resize(limit, window)
+        resized.append(bucket)
+    return resized
+
+
+def _missing_windows(known: Iterable[Tuple[int, int]], windows: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    # 이미 아는 창(기본값이나 응답 헤더로 배운 값)은 그대로 두고 없는 창만
+    seen = {w for _, w in known}
+    return [(l, w) for l, w in windows if w not in seen]
+
+
+class RiotRateLimiter:
+    """호스트(라우팅 값)별 앱 한도 + 메서드별 한도를 동시에 지키는 asyncio 레이트 리미터
+
+    한도를 넘으면 예외 대신 슬롯이 빌 때까지 기다린다.
+    """
+
+    def __init__(self, app_limits: Iterable[Tuple[int, int]] = DEFAULT_APP_LIMITS):
+        self.app_limits = list(app_limits)
+        self._app: Dict[str, List[TokenBucket]] = {}
+        self._methods: Dict[Tuple[str, str], List[TokenBucket]] = {}
+        self._lock = asyncio.Lock()
+        self.ledger: Optional[RateLedger] = None  # 프로세스 안에서만 한도 관리
+
+    def seed_app_limits(self, app_limits: Iterable[Tuple[int, int]]):
+        """헤더를 받기 전까지 사용할 기본 앱 한도에 없는 창만 추가 (있는 창은 바꾸지 않음)"""
+        added = _missing_windows(self.app_limits, app_limits)
+        self.app_limits += added
+        for host, buckets in self._app.items():
+            buckets += [TokenBucket(l, w) for l, w in _missing_windows(((b.limit, b.window) for b in buckets), added)]
+
+    def _buckets(self, host: str, method: str) -> List[TokenBucket]:
+        app = self._app.setdefault(host, [TokenBucket(l, w) for l, w in self.app_limits])
+        return app + self._methods.get((host, method), [])
+
+    async def acquire(self, host: str, method: str):
+        """앱/메서드 한도 모두에 여유가 생길 때까지 대기 후 1회분 차감"""
+        while True:
+            async with self._lock:
+                now = time.monotonic()
+                buckets = self._buckets(host, method)
+                wait = max((b.wait_time(now) for b in buckets), default=0.0)
+                if wait <= 0:
+                    for b in buckets:
+                        b.take()
+                    return
+            await asyncio.sleep(wait)
+
+    def update_from_headers(self, host: str, method: str, headers):
+        """X-App-Rate-Limit / X-Method-Rate-Limit 응답 헤더로 버킷 크기와 사용량 갱신"""
+        app_windows = parse_rate_limit_header(headers.get("X-App-Rate-Limit"))
+        if app_windows:
+            self._app[host] = _resize_buckets(self._app.get(host, []), app_windows)
+        method_windows = parse_rate_limit_header(headers.get("X-Method-Rate-Limit"))
+        if method_windows:
+            key = (host, method)
+            self._methods[key] = _resize_buckets(self._methods.get(key, []), method_windows)
+
+        for header, buckets in (("X-App-Rate-Limit-Count", self._app.get(host, [])),
+                                ("X-Method-Rate-Limit-Count", self._methods.get((host, method), []))):
+            counts = dict((w, c) for c, w in parse_rate_limit_header(headers.get(header)))
+            for b in buckets:
+                if b.window in counts:
+                    b.sync_count(counts[b.window])
+
+    def _snapshots(self, host: str, method: str) -> List[Dict]:
+        return [b.snapshot() for b in self._buckets(host, method)]
+
+    def remaining(self, host: str, method: Optional[str] = None) -> int:
+        """지금 바로 보낼 수 있는 요청 수 (동시성 크기 산정용)"""
+        snapshots = self._snapshots(host, method or "")
+        return min(s["remaining"] for s in snapshots) if snapshots else 0
+
+    def headroom(self, host: str, method: Optional[str] = None) -> float:
+        """가장 빠듯한 버킷의 남은 비율 (0~1, 버킷을 아직 모르면 1)"""
+        snapshots = [s for s in self._snapshots(host, method or "") if s["limit"]]
+        return min(s["remaining"] / s["limit"] for s in snapshots) if snapshots else 1.0
+
+    def budget(self) -> Dict:
+        """호스트별 현재 남은 한도"""
+        result = {}
+        for host, buckets in self._app.items():
+            result[host] = {
+                "app": [b.snapshot() for b in buckets],
+                "methods": {m: [b.snapshot() for b in bs] for (h, m), bs in self._methods.items() if h == host},
+            }
+        return result
+
+
+class LedgerBucket(TokenBucket):
+    """장부에 저장되는 버킷 (프로세스끼리 시각을 비교하므로 벽시계 사용)"""
+
+    clock = staticmethod(time.time)
+
+    @classmethod
+    def from_row(cls, row) -> "LedgerBucket":
+        capacity, window, tokens, updated = row
+        bucket = cls(capacity, window)
+        bucket.tokens, bucket.updated = tokens, updated
+        return bucket
+
+    def to_row(self):
+        return self.limit, self.window, self.tokens, self.updated
+
+
+class SharedRiotRateLimiter(RiotRateLimiter):
+    """RiotRateLimiter와 같은 규칙이지만 버킷 상태를 RateLedger(sqlite)에 두고 워커끼리 공유
+
+    차감은 장부 트랜잭션 안에서 일어나므로 워커가 몇 개든 앱 한도는 하나로 지켜진다.
+    """
+
+    def __init__(self, app_limits: Iterable[Tuple[int, int]] = DEFAULT_APP_LIMITS,
+                 ledger: Optional[RateLedger] = None):
+        super().__init__(app_limits)
+        self.ledger = ledger or rate_ledger
+
+    @staticmethod
+    def _app_scope(host: str) -> str:
+        return f"app|{host}"
+
+    @staticmethod
+    def _method_scope(host: str, method: str) -> str:
+        return f"method|{host}|{method}"
+
+    def _load(self, db, scope: str, defaults: Iterable[Tuple[int, int]] = ()) -> List[TokenBucket]:
+        rows = self.ledger.load(db, scope)
+        if rows:
+            return [LedgerBucket.from_row(r) for r in rows]
+        return [LedgerBucket(l, w) for l, w in defaults]
+
+    def seed_app_limits(self, app_limits: Iterable[Tuple[int, int]]):
+        # 다른 워커가 헤더로 배운 창은 지우거나 바꾸지 않고 장부에 없는 창만 추가
+        added = _missing_windows(self.app_limits, app_limits)
+        self.app_limits += added
+        if not added:
+            return
+        with self.ledger.transaction() as db:
+            for scope in [s for (s,) in db.execute("SELECT DISTINCT scope FROM riot_rate_buckets WHERE scope LIKE 'app|%'")]:
+                self.ledger.insert_missing(db, scope, [LedgerBucket(l, w).to_row() for l, w in added])
+
+    def _try_acquire(self, host: str, method: str) -> float:
+        """여유가 있으면 차감하고 0, 없으면 기다릴 시간(초)"""
+        app_scope, method_scope = self._app_scope(host), self._method_scope(host, method)
+        with self.ledger.transaction() as db:
+            app = self._load(db, app_scope, self.app_limits)
+            methods = self._load(db, method_scope)
+            now = LedgerBucket.clock()
+            wait = max((b.wait_time(now) for b in app + methods), default=0.0)
+            if wait <= 0:
+                for b in app + methods:
+                    b.take()
+            self.ledger.save(db, app_scope, [b.to_row() for b in app])
+            if methods:
+                self.ledger.save(db, method_scope, [b.to_row() for b in methods])
+        return wait
+
+    async def acquire(self, host: str, method: str):
+        while True:
+            # 장부 잠금을 다른 워커가 쥐고 있으면 기다려야 하므로 이벤트 루프를 막지 않게 스레드에서
+            wait = await asyncio.to_thread(self._try_acquire, host, method)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def update_from_headers(self, host: str, method: str, headers):
+        # 응답 처리를 막지 않도록 장부 갱신은 스레드에 맡기고 기다리지 않음
+        headers = {k: headers.get(k) for k in ("X-App-Rate-Limit", "X-Method-Rate-Limit",
+                                               "X-App-Rate-Limit-Count", "X-Method-Rate-Limit-Count")}
+        if not any(headers.values()):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._apply_headers(host, method, headers)
+        else:
+            loop.run_in_executor(None, self._apply_headers, host, method, headers)
+
+    def _apply_headers(self, host: str, method: str, headers):
+        app_windows = parse_rate_limit_header(headers.get("X-App-Rate-Limit"))
+        method_windows = parse_rate_limit_header(headers.get("X-Method-Rate-Limit"))
+        app_counts = parse_rate_limit_header(headers.get("X-App-Rate-Limit-Count"))
+        method_counts = parse_rate_limit_header(headers.get("X-Method-Rate-Limit-Count"))
+        if not (app_windows or method_windows or app_counts or method_counts):
+            return
+        with self.ledger.transaction() as db:
+            for scope, windows, counts, defaults in (
+                (self._app_scope(host), app_windows, app_counts, self.app_limits),
+                (self._method_scope(host, method), method_windows, method_counts, ()),
+            ):
+                buckets = self._load(db, scope, defaults)
+                if windows:
+                    buckets = _resize_buckets(buckets, windows, LedgerBucket)
+                counts = dict((w, c) for c, w in counts)
+                for b in buckets:
+                    if b.window in counts:
+                        b.sync_count(counts[b.window])
+                if buckets:
+                    self.ledger.save(db, scope, [b.to_row() for b in buckets])
+
+    def _snapshots(self, host: str, method: str) -> List[Dict]:
+        rows = self.ledger.scopes(self._app_scope(host)).get(self._app_scope(host), [])
+        rows += self.ledger.scopes(self._method_scope(host, method)).get(self._method_scope(host, method), [])
+        return [LedgerBucket.from_row(r).snapshot() for r in rows]
+
+    def budget(self) -> Dict:
+        result = {}
+        for scope, rows in self.ledger.scopes().items():
+            kind, host, *method = scope.split("|", 2)
+            entry = result.setdefault(host, {"app": [], "methods": {}})
+            snapshots = [LedgerBucket.from_row(r).snapshot() for r in rows]
+            if kind == "app":
+                entry["app"] = snapshots
+            else:
+                entry["methods"][method[0]] = snapshots
+        return result
+
+
+# 전역 인스턴스
+riot_rate_limiter = SharedRiotRateLimiter() if SHARED_RATE_LIMIT else RiotRateLimiter()
@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+from .storage import connect, data_path
+
+CACHE_PATH = os.getenv("RIOT_CACHE_PATH") or data_path("riot_cache.db")
+CACHE_MAX_ENTRIES = int(os.getenv("RIOT_CACHE_MAX_ENTRIES", "20000"))
+CACHE_MAX_BYTES = int(os.getenv("RIOT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# 엔드포인트 종류별 TTL (초)
+CACHE_TTLS = {
+    "account": 3 * 24 * 3600,   # Riot ID -> PUUID: 며칠
+    "summoner": 6 * 3600,       # 소환사 정보: 몇 시간
+    "league": 10 * 60,          # 리그 정보: 몇 분
+    "mastery": 3600,            # 챔피언 숙련도: 1시간
+}
+
+# 404(없는 Riot ID 등) 응답은 짧게만 기억하고, 개수도 따로 제한
+NEGATIVE_TTL = int(os.getenv("RIOT_NEGATIVE_TTL", "300"))
+NEGATIVE_MAX_ENTRIES = int(os.getenv("RIOT_NEGATIVE_MAX_ENTRIES", "5000"))
+NEGATIVE_KIND = "notfound"
+# 만료된 응답도 이 시간(초) 동안은 지우지 않고 남겨 두었다가, 호스트 회로가 열렸을 때 대신 돌려준다
+STALE_GRACE = int(os.getenv("RIOT_CACHE_STALE_GRACE", str(24 * 3600)))
+# 캐시 적중 때의 LRU 접근 시각은 메모리에 모았다가 이만큼 쌓이면(또는 정리할 때) 한 번에 기록
+TOUCH_FLUSH_BATCH = 500
+
+
+def cache_key(url: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """엔드포인트 URL + 정렬된 쿼리 파라미터"""
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted(params.items()))}"
+
+
+class RiotCache:
+    """sqlite 파일에 저장되는 TTL 캐시 (재시작 후에도 유지, LRU + 용량 제한으로 정리)
+
+    적중할 때마다 쓰기 잠금을 잡지 않도록 접근 시각 갱신은 모아 두고, 정리(eviction)와 함께
+    이벤트 루프 밖에서 별도 연결로 기록한다.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, max_entries: int = CACHE_MAX_ENTRIES,
+                 max_bytes: int = CACHE_MAX_BYTES, ttls: Optional[Dict[str, int]] = None,
+                 negative_ttl: int = NEGATIVE_TTL, negative_max_entries: int = NEGATIVE_MAX_ENTRIES,
+                 stale_grace: int = STALE_GRACE):
+        self.path = path
+        self.stale_grace = stale_grace
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.negative_ttl = negative_ttl
+        self.negative_max_entries = negative_max_entries
+        self.ttls = dict(CACHE_TTLS, **(ttls or {}))
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._writes = 0
+        self._touched: Dict[str, float] = {}
+        self._bg_lock = threading.Lock()
+        self._bg_conn = None
+
+    def _db(self):
+        if self._conn is None:
+            self._conn = connect(self.path)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS riot_cache (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expiresAt REAL NOT NULL,
+                    accessedAt REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_riot_cache_accessed ON riot_cache (accessedAt)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_riot_cache_kind ON riot_cache (kind, accessedAt)")
+        return self._conn
+
+    def _bg_db(self):
+        # 접근 시각 기록/정리용 연결 (여기서 다른 워커를 기다려도 조회 쪽 잠금은 잡지 않음)
+        if self._bg_conn is None:
+            with self._lock:
+                self._db()   # 테이블 생성
+            self._bg_conn = connect(self.path)
+        return self._bg_conn
+
+    def _in_background(self, fn):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            fn()
+        else:
+            loop.run_in_executor(None, fn)
+
+    def _lookup(self, key: str, grace: float = 0) -> Optional[Any]:
+        now = time.time()
+        db = self._db()
+        row = db.execute("SELECT value, expiresAt FROM riot_cache WHERE key = ?", (key,)).fetchone()
+        if row and row[1] + grace > now:
+            self._touched[key] = now
+            if len(self._touched) == TOUCH_FLUSH_BATCH:
+                self._in_background(self.flush)
+            return json.loads(row[0])
+        # 유예 기간 안의 만료 항목은 get_stale용으로 남겨둠 (404 항목은 유예 없음)
+        if row and (key.startswith("404:") or row[1] + self.stale_grace <= now):
+            db.execute("DELETE FROM riot_cache WHERE key = ?", (key,))
+        return None
+
+    def get(self, kind: str, key: str) -> Optional[Any]:
+        with self._lock:
+            value = self._lookup(key)
+            counter = self.misses if value is None else self.hits
+            counter[kind] = counter.get(kind, 0) + 1
+            return value
+
+    def set(self, kind: str, key: str, value: Any, ttl: Optional[int] = None):
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        expires_at = now + (ttl if ttl is not None else self.ttls.get(kind, 0))
+        with self._lock:
+            db = self._db()
+            db.execute(
+                "INSERT OR REPLACE INTO riot_cache (key, kind, value, size, expiresAt, accessedAt) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, payload, len(payload), expires_at, now)
+            )
+            self._writes += 1
+            if self._writes % 100 == 0:
+                self._in_background(self.evict)
+
+    def get_stale(self, key: str) -> Optional[Any]:
+        """만료됐더라도 유예 기간 안이면 마지막으로 받은 응답 (업스트림 장애 때만 사용)"""
+        with self._lock:
+            return self._lookup(key, grace=self.stale_grace)
+
+    def get_negative(self, key: str) -> Optional[Any]:
+        """최근에 404였던 요청이면 그때의 응답 본문 (양성 캐시와 키가 겹치지 않게 접두어 사용)"""
+        with self._lock:
+            value = self._lookup(f"404:{key}")
+            if value is not None:
+                # 미스는 이미 원래 종류에서 셌으므로 적중만 기록
+                self.hits[NEGATIVE_KIND] = self.hits.get(NEGATIVE_KIND, 0) + 1
+            return value
+
+    def set_negative(self, key: str, body: Any):
+        if self.negative_ttl > 0:
+            self.set(NEGATIVE_KIND, f"404:{key}", body, ttl=self.negative_ttl)
+
+    def _evict(self, db, now: float):
+        # 유예 기간까지 지난 만료 항목 삭제 후 개수/용량 초과분을 오래 안 쓴 순서로 삭제
+        db.execute("DELETE FROM riot_cache WHERE expiresAt <= ? OR (kind = ? AND expiresAt <= ?)",
+                   (now - self.stale_grace, NEGATIVE_KIND, now))
+        # 404 항목은 오타가 쌓여 정상 캐시를 밀어내지 않도록 별도 상한
+        db.execute("""
+            DELETE FROM riot_cache WHERE key IN (
+                SELECT key FROM riot_cache WHERE kind = ? ORDER BY accessedAt DESC LIMIT -1 OFFSET ?
+            )
+        """, (NEGATIVE_KIND, self.negative_max_entries))
+        count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM riot_cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        removed = 0
+        for key, size in db.execute("SELECT key, size FROM riot_cache ORDER BY accessedAt").fetchall():
+            if count - removed <= self.max_entries and total <= self.max_bytes:
+                break
+            db.execute("DELETE FROM riot_cache WHERE key = ?", (key,))
+            removed += 1
+            total -= size
+
+    def flush(self):
+        """모아 둔 적중 시각을 한 트랜잭션으로 기록"""
+        with self._lock:
+            touched, self._touched = self._touched, {}
+        if not touched:
+            return
+        with self._bg_lock:
+            db = self._bg_db()
+            db.execute("BEGIN")
+            try:
+                db.executemany("UPDATE riot_cache SET accessedAt = MAX(accessedAt, ?) WHERE key = ?",
+                               [(at, key) for key, at in touched.items()])
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+
+    def evict(self):
+        # LRU 순서가 맞도록 접근 시각부터 기록하고 정리
+        self.flush()
+        with self._bg_lock:
+            self._evict(self._bg_db(), time.time())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, total = self._db().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM riot_cache").fetchone()
+        kinds = sorted(set(self.hits) | set(self.misses))
+        return {
+            "entries": count,
+            "bytes": total,
+            "hits": sum(self.hits.values()),
+            "misses": sum(self.misses.values()),
+            "byKind": {k: {"hits": self.hits.get(k, 0), "misses": self.misses.get(k, 0)} for k in kinds},
+        }
+
+
+# 전역 인스턴스 (RiotAPIService와 riot_client가 함께 사용)
+riot_cache = RiotCache()
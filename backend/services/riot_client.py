@@ -1,6 +1,11 @@
-import os, time, requests
+import os
+import asyncio
 from typing import Optional, List, Dict
 from dotenv import load_dotenv
+from .riot_http import riot_http, riot_base_url
+from .match_store import match_store
+from .riot_id import is_valid_riot_id
+from .riot_scheduler import use_priority
 
 load_dotenv()
 RIOT_API_KEY = os.getenv("RIOT_API_KEY")
@@ -25,47 +30,108 @@ REGION_BASE = {
     "EUROPE": "https://europe.api.riotgames.com",
 }
 
+# RIOT_API_BASE_URL로 로컬 가짜 서버를 가리킬 수 있음
+PLATFORM_BASE = {k: riot_base_url(v) for k, v in PLATFORM_BASE.items()}
+REGION_BASE = {k: riot_base_url(v) for k, v in REGION_BASE.items()}
+
 PLATFORM_TO_REGION = {
     "KR": "ASIA", "JP1": "ASIA", "OC1": "ASIA",
     "NA1": "AMERICAS", "BR1": "AMERICAS", "LA1": "AMERICAS", "LA2": "AMERICAS",
     "EUW1": "EUROPE", "EUN1": "EUROPE", "TR1": "EUROPE", "RU": "EUROPE",
 }
 
-def _riot_get(url: str, params: Optional[dict] = None, retries: int = 3):
+async def _riot_get(url: str, method: str, params: Optional[dict] = None, retries: int = 3,
+                    cache_kind: Optional[str] = None):
     if not RIOT_API_KEY:
         raise RuntimeError("RIOT_API_KEY is not set")
     headers = {"X-Riot-Token": RIOT_API_KEY}
-    for attempt in range(retries):
-        r = requests.get(url, headers=headers, params=params, timeout=10)
-        if r.status_code == 429:
-            wait = int(r.headers.get("Retry-After", "2"))
-            time.sleep(wait); continue
-        if 200 <= r.status_code < 300:
-            return r.json()
-        if r.status_code >= 500 and attempt < retries - 1:
-            time.sleep(1.5 * (attempt + 1)); continue
-        raise RuntimeError(f"Riot API error {r.status_code}: {r.text}")
-    raise RuntimeError("Riot API retries exhausted")
-
-def get_account_by_riot_id(platform: str, game_name: str, tag_line: str) -> Dict:
+    # 429(Retry-After, 라우트 공유 백오프)와 5xx(지터 지수 백오프) 재시도는 riot_http가 처리
+    r = await riot_http.get_json(url, method, headers, params, cache_kind=cache_kind, retries=retries)
+    if 200 <= r.status < 300:
+        return r.data
+    if r.status == 429:
+        raise RuntimeError("Riot API retries exhausted")
+    raise RuntimeError(f"Riot API error {r.status}: {r.data}")
+
+async def get_account_by_riot_id(platform: str, game_name: str, tag_line: str) -> Dict:
+    if not is_valid_riot_id(game_name, tag_line):
+        raise ValueError(f"Invalid Riot ID: {game_name}#{tag_line}")
     region = PLATFORM_TO_REGION.get(platform, "ASIA")
     url = f"{REGION_BASE[region]}/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
-    return _riot_get(url)
+    return await _riot_get(url, "account-v1.by-riot-id", cache_kind="account")
 
-def get_summoner_by_puuid(platform: str, puuid: str) -> Dict:
+async def get_summoner_by_puuid(platform: str, puuid: str) -> Dict:
     url = f"{PLATFORM_BASE[platform]}/lol/summoner/v4/summoners/by-puuid/{puuid}"
-    return _riot_get(url)
+    return await _riot_get(url, "summoner-v4.by-puuid", cache_kind="summoner")
 
-def get_league_entries(platform: str, summoner_id: str) -> list:
+async def get_league_entries(platform: str, summoner_id: str) -> list:
     url = f"{PLATFORM_BASE[platform]}/lol/league/v4/entries/by-summoner/{summoner_id}"
-    return _riot_get(url)
+    return await _riot_get(url, "league-v4.entries-by-summoner", cache_kind="league")
+
+async def get_league_entries_by_puuid(platform: str, puuid: str) -> list:
+    url = f"{PLATFORM_BASE[platform]}/lol/league/v4/entries/by-puuid/{puuid}"
+    return await _riot_get(url, "league-v4.entries-by-puuid", cache_kind="league")
+
+async def get_champion_mastery_by_puuid(platform: str, puuid: str) -> list:
+    url = f"{PLATFORM_BASE[platform]}/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}"
+    return await _riot_get(url, "champion-mastery-v4.by-puuid", cache_kind="mastery")
 
-def get_recent_match_ids(platform: str, puuid: str, count: int = 8) -> List[str]:
+async def get_recent_match_ids(platform: str, puuid: str, count: int = 8) -> List[str]:
     region = PLATFORM_TO_REGION.get(platform, "ASIA")
     url = f"{REGION_BASE[region]}/lol/match/v5/matches/by-puuid/{puuid}/ids"
-    return _riot_get(url, params={"start": 0, "count": count})
+    return await _riot_get(url, "match-v5.ids-by-puuid", params={"start": 0, "count": count})
 
-def get_match(platform: str, match_id: str) -> dict:
+async def get_new_match_ids(platform: str, puuid: str, count: int = 8) -> List[str]:
+    """동기화 커서 이후의 매치 ID 중 아직 로컬 기록에 없는 것만
+
+    로컬 기록이 count보다 적으면(첫 동기화 등) 최근 count개를 그대로 요청한다.
+    """
+    region = PLATFORM_TO_REGION.get(platform, "ASIA")
+    url = f"{REGION_BASE[region]}/lol/match/v5/matches/by-puuid/{puuid}/ids"
+    params = {"start": 0, "count": count}
+    cursor = match_store.sync_cursor(puuid)
+    if cursor is not None and match_store.history_size(puuid) >= count:
+        # startTime은 초 단위, 마지막 매치가 끝난 뒤에 시작한 매치만
+        params["startTime"] = cursor // 1000 + 1
+    ids = await _riot_get(url, "match-v5.ids-by-puuid", params=params)
+    known = match_store.known_ids(puuid, ids)
+    return [mid for mid in ids if mid not in known]
+
+def record_match_history(puuid: str, results: List) -> List[BaseException]:
+    """gather(return_exceptions=True) 결과를 로컬 기록에 합치고 실패한 것만 반환
+
+    하나라도 실패하면 커서를 옮기지 않아 다음 동기화 때 빠진 매치를 다시 받는다.
+    """
+    matches = [m for m in results if not isinstance(m, BaseException)]
+    failed = [e for e in results if isinstance(e, BaseException)]
+    match_store.add_history(puuid, matches, advance_cursor=not failed)
+    return failed
+
+async def sync_match_history(platform: str, puuid: str, count: int = 8,
+                             priority: str = "background") -> List[dict]:
+    """목록 호출 1번 + 새 매치만 받아 로컬 기록을 갱신하고 최근 count개 반환 (기본은 백그라운드 우선순위)"""
+    with use_priority(priority):
+        new_ids = await get_new_match_ids(platform, puuid, count)
+        results = await asyncio.gather(*[get_match(platform, mid) for mid in new_ids], return_exceptions=True)
+    failed = record_match_history(puuid, results)
+    if failed:
+        raise failed[0]
+    return local_match_history(puuid, count)
+
+def local_match_history(puuid: str, count: int = 8) -> List[dict]:
+    """로컬에 쌓인 최근 매치 요약 (최신순)"""
+    return match_store.history(puuid, count)
+
+async def get_match(platform: str, match_id: str) -> dict:
+    """매치 요약 (queueId, 참가자 puuid/win/챔피언/포지션) - 한 번 받은 매치는 로컬 저장소에서 읽음"""
+    stored = match_store.get(match_id)
+    if stored is not None:
+        return stored
     region = PLATFORM_TO_REGION.get(platform, "ASIA")
     url = f"{REGION_BASE[region]}/lol/match/v5/matches/{match_id}"
-    return _riot_get(url)
+    return match_store.put(match_id, await _riot_get(url, "match-v5.match"))
+
+async def get_match_raw(platform: str, match_id: str) -> dict:
+    """원본 match-v5 응답"""
+    await get_match(platform, match_id)
+    return match_store.get_raw(match_id)
@@ -0,0 +1,258 @@
+import os
+import math
+import time
+import asyncio
+import aiohttp
+from collections import deque
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+from urllib.parse import urlsplit
+from .rate_limiter import RiotRateLimiter, riot_rate_limiter
+from .riot_cache import RiotCache, cache_key, riot_cache
+from .single_flight import SingleFlight
+from .backoff import RouteBackoff, jittered_delay
+from .riot_scheduler import RiotScheduler
+from .riot_metrics import RiotMetrics, riot_metrics
+from .circuit_breaker import CircuitBreakers
+
+# 호스트별 커넥션 풀 설정 (환경변수로 조정 가능)
+LIMIT_PER_HOST = int(os.getenv("RIOT_HTTP_LIMIT_PER_HOST", "20"))
+KEEPALIVE_TIMEOUT = float(os.getenv("RIOT_HTTP_KEEPALIVE", "60"))
+DNS_CACHE_TTL = int(os.getenv("RIOT_HTTP_DNS_TTL", "300"))
+REQUEST_TIMEOUT = float(os.getenv("RIOT_HTTP_TIMEOUT", "10"))
+# 설정하면 모든 라이엇 호스트 대신 이 주소로 요청 (로컬 가짜 서버, 벤치마크, CI용)
+RIOT_API_BASE_URL = os.getenv("RIOT_API_BASE_URL", "").rstrip("/")
+# 응답이 라우트의 최근 p95보다 늦으면 같은 GET을 한 번 더 보내 먼저 온 응답을 사용 (hedged request)
+HEDGE_ENABLED = os.getenv("RIOT_HEDGE", "1") != "0"
+# 남은 한도 비율이 이보다 클 때만 추가 요청을 보냄
+HEDGE_HEADROOM = float(os.getenv("RIOT_HEDGE_HEADROOM", "0.5"))
+HEDGE_MIN_SAMPLES = 20   # p95를 믿을 만한 최소 표본 수
+HEDGE_MAX_RATIO = 0.1    # 최근 HEDGE_WINDOW번 호출 중 추가 요청 비율 상한
+HEDGE_WINDOW = 200
+
+
+def riot_base_url(default: str) -> str:
+    """RIOT_API_BASE_URL이 있으면 그 주소, 없으면 원래 라이엇 호스트"""
+    return RIOT_API_BASE_URL or default
+
+
+class RiotResponse(NamedTuple):
+    status: int
+    data: Any
+    headers: Dict[str, str]
+
+
+class RiotHttpClient:
+    """라이엇 호스트(asia/kr/...)마다 하나씩 유지되는 aiohttp 세션 풀"""
+
+    def __init__(self, limit_per_host: int = LIMIT_PER_HOST, keepalive_timeout: float = KEEPALIVE_TIMEOUT,
+                 dns_ttl: int = DNS_CACHE_TTL, timeout: float = REQUEST_TIMEOUT,
+                 limiter: Optional[RiotRateLimiter] = None, cache: Optional[RiotCache] = None,
+                 metrics: Optional[RiotMetrics] = None):
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_ttl = dns_ttl
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._lock = asyncio.Lock()
+        self.limiter = limiter or riot_rate_limiter
+        self.cache = cache or riot_cache
+        # 동시에 들어온 같은 요청은 업스트림 호출 하나를 공유
+        self.single_flight = SingleFlight()
+        # 429를 받은 라우트는 모든 호출자가 함께 쉼 (공유 장부가 있으면 다른 워커까지)
+        self.backoff = RouteBackoff(self.limiter.ledger)
+        # 대화형 호출이 백그라운드 호출보다 먼저 한도를 쓰도록 리미터 앞에 우선순위 큐
+        self.scheduler = RiotScheduler(self.limiter)
+        # 호출별 라우트/지역/상태/지연/캐시/재시도 기록
+        self.metrics = metrics or riot_metrics
+        # 타임아웃/5xx가 이어지는 호스트는 잠시 부르지 않음
+        self.breakers = CircuitBreakers()
+        self.hedge = HEDGE_ENABLED
+        self._hedged: deque = deque(maxlen=HEDGE_WINDOW)  # 최근 호출별 추가 요청 여부
+        self.hedge_wins = 0
+
+    def _new_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.limit_per_host,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_ttl,
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+    async def start(self, base_urls: Iterable[str] = ()):
+        """앱 시작 시 주요 호스트의 세션을 미리 만들어 둔다"""
+        for base_url in base_urls:
+            await self.session(base_url)
+
+    async def session(self, url: str) -> aiohttp.ClientSession:
+        """URL의 호스트에 해당하는 세션 반환 (없으면 생성)"""
+        host = urlsplit(url).netloc
+        session = self._sessions.get(host)
+        if session is not None and not session.closed:
+            return session
+        async with self._lock:
+            session = self._sessions.get(host)
+            if session is None or session.closed:
+                session = self._new_session()
+                self._sessions[host] = session
+            return session
+
+    async def get_json(self, url: str, method: str, headers: Optional[Dict[str, str]] = None,
+                       params: Optional[Dict[str, Any]] = None, cache_kind: Optional[str] = None,
+                       retries: int = 3) -> RiotResponse:
+        """레이트 리미터를 거쳐 GET 요청 (200이 아니면 data는 응답 본문 문자열)
+
+        method는 'summoner-v4.by-puuid'처럼 메서드별 한도를 구분하는 키,
+        cache_kind를 주면 해당 종류의 TTL로 응답을 캐시하고, 404는 짧은 TTL로 따로 기억한다.
+        429/5xx는 retries번까지 재시도하고, 마지막 응답을 그대로 돌려준다.
+        호스트 회로가 열려 있으면 기다리지 않고 만료된 캐시(X-Cache: STALE)나 503을 돌려준다.
+        """
+        key = cache_key(url, params)
+        host = urlsplit(url).netloc
+        started = time.monotonic()
+        if cache_kind:
+            cached = self.cache.get(cache_kind, key)
+            if cached is not None:
+                self.metrics.record(method, host, 200, time.monotonic() - started, "hit")
+                return RiotResponse(200, cached, {"X-Cache": "HIT"})
+            # 최근에 404였던 요청(없는 Riot ID 등)은 짧은 TTL 동안 다시 묻지 않음
+            not_found = self.cache.get_negative(key)
+            if not_found is not None:
+                self.metrics.record(method, host, 404, time.monotonic() - started, "negative")
+                return RiotResponse(404, not_found, {"X-Cache": "NEGATIVE"})
+
+        joined = self.single_flight.inflight(key)
+        result = await self.single_flight.do(key, lambda: self._fetch(url, key, method, headers, params, cache_kind, retries))
+        if joined:
+            self.metrics.record(method, host, result.status, time.monotonic() - started, "shared")
+        return result
+
+    async def _fetch(self, url: str, key: str, method: str, headers: Optional[Dict[str, str]],
+                     params: Optional[Dict[str, Any]], cache_kind: Optional[str], retries: int) -> RiotResponse:
+        host = urlsplit(url).netloc
+        breaker = self.breakers.get(host)
+        for attempt in range(retries):
+            if not breaker.allow():
+                return self._fail_fast(key, method, host, cache_kind)
+            await self.backoff.wait(host, method)
+            await self.scheduler.acquire(host, method)
+            sent = time.monotonic()
+            try:
+                result = await self._send(url, host, method, headers, params)
+            except Exception as e:
+                # 타임아웃/연결 오류는 상태 0으로 기록
+                self.metrics.record(method, host, 0, time.monotonic() - sent, "miss", attempt)
+                if isinstance(e, (asyncio.TimeoutError, aiohttp.ClientError)):
+                    breaker.failure()
+                raise
+            latency = time.monotonic() - sent
+            if result.status >= 500:
+                breaker.failure()
+            else:
+                breaker.success()
+
+            last_attempt = attempt == retries - 1
+            if result.status == 429:
+                # Retry-After 동안 이 라우트의 모든 대기 호출을 멈춤 (헤더가 없으면 지터 지수 백오프)
+                retry_after = result.headers.get("Retry-After")
+                delay = float(retry_after) if retry_after else jittered_delay(attempt)
+                self.backoff.block(host, method, delay, result.headers.get("X-Rate-Limit-Type"))
+                if not last_attempt:
+                    continue
+            elif result.status >= 500 and not last_attempt:
+                await asyncio.sleep(jittered_delay(attempt))
+                continue
+            break
+
+        self.metrics.record(method, host, result.status, latency, "miss", attempt)
+        if cache_kind and result.status == 200:
+            self.cache.set(cache_kind, key, result.data)
+        elif cache_kind and result.status == 404:
+            self.cache.set_negative(key, result.data)
+        return result
+
+    def _fail_fast(self, key: str, method: str, host: str, cache_kind: Optional[str]) -> RiotResponse:
+        """회로가 열린 호스트: 만료된 캐시가 있으면 그것으로, 없으면 바로 503"""
+        stale = self.cache.get_stale(key) if cache_kind else None
+        if stale is not None:
+            self.metrics.record(method, host, 200, 0.0, "stale")
+            return RiotResponse(200, stale, {"X-Cache": "STALE"})
+        self.metrics.record(method, host, 503, 0.0, "open")
+        retry_after = math.ceil(self.breakers.get(host).retry_after())
+        return RiotResponse(503, f"circuit open for {host}", {"Retry-After": str(retry_after), "X-Circuit": "OPEN"})
+
+    async def _request(self, url: str, host: str, method: str, headers: Optional[Dict[str, str]],
+                       params: Optional[Dict[str, Any]]) -> RiotResponse:
+        session = await self.session(url)
+        async with session.get(url, headers=headers, params=params) as response:
+            self.limiter.update_from_headers(host, method, response.headers)
+            data = await response.json() if response.status == 200 else await response.text()
+            return RiotResponse(response.status, data, dict(response.headers))
+
+    def _hedge_delay(self, host: str, method: str) -> Optional[float]:
+        """추가 요청을 보낼 기준 지연(최근 p95), 보내지 않을 상황이면 None"""
+        if not self.hedge or sum(self._hedged) >= HEDGE_MAX_RATIO * HEDGE_WINDOW:
+            return None
+        return self.metrics.latency_quantile(method, host, 0.95, HEDGE_MIN_SAMPLES)
+
+    async def _send(self, url: str, host: str, method: str, headers: Optional[Dict[str, str]],
+                    params: Optional[Dict[str, Any]]) -> RiotResponse:
+        """GET 한 번 (p95를 넘기면 한도 여유가 있을 때 같은 요청을 하나 더 보내고 먼저 온 응답 사용)"""
+        delay = self._hedge_delay(host, method)
+        first = asyncio.ensure_future(self._request(url, host, method, headers, params))
+        tasks = [first]
+        acquire = None
+        try:
+            if delay is not None:
+                await asyncio.wait(tasks, timeout=delay)
+            if first.done() or delay is None or self.limiter.headroom(host, method) <= HEDGE_HEADROOM:
+                self._hedged.append(False)
+                return await first
+            # 추가 요청도 한도 1회분을 쓰므로 스케줄러를 거침 (그 사이 첫 응답이 오면 그대로 사용)
+            acquire = asyncio.ensure_future(self.scheduler.acquire(host, method))
+            await asyncio.wait([first, acquire], return_when=asyncio.FIRST_COMPLETED)
+            if first.done():
+                self._hedged.append(False)
+                return await first
+            self._hedged.append(True)
+            tasks.append(asyncio.ensure_future(self._request(url, host, method, headers, params)))
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # 한쪽이 실패하면 다른 쪽 응답을 기다림
+                for task in sorted(done, key=lambda t: t.exception() is not None):
+                    if task.exception() is None or not pending:
+                        if task is not first:
+                            self.hedge_wins += 1
+                        return task.result()
+        finally:
+            if acquire is not None:
+                acquire.cancel()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cache": self.cache.stats(),
+            "singleFlight": self.single_flight.stats(),
+            "rateLimit": self.limiter.budget(),
+            "backoff": self.backoff.stats(),
+            "scheduler": self.scheduler.stats(),
+            "circuits": self.breakers.stats(),
+            "hedge": {"enabled": self.hedge, "recentRatio": round(sum(self._hedged) / len(self._hedged), 3) if self._hedged else 0.0,
+                      "wins": self.hedge_wins},
+        }
+
+    async def close(self):
+        """앱 종료 시 모든 세션 정리"""
+        self.cache.flush()
+        sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            if not session.closed:
+                await session.close()
+
+
+# 전역 인스턴스 (RiotAPIService와 라우터가 함께 사용)
+riot_http = RiotHttpClient()
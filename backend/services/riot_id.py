@@ -0,0 +1,30 @@
+from typing import Optional, Tuple
+
+# 라이엇 ID 규칙: 게임 이름 3~16자, 태그 3~5자 (영문/숫자/각국 문자)
+GAME_NAME_LENGTH = (3, 16)
+TAG_LINE_LENGTH = (3, 5)
+# URL 경로나 Riot ID 구분자로 쓰이는 문자는 이름에 들어갈 수 없음
+FORBIDDEN_CHARS = set("#/\\?%&")
+
+
+def is_valid_riot_id(game_name: str, tag_line: str) -> bool:
+    """API를 부르기 전에 로컬에서 Riot ID 형식만 검사 (형식이 틀리면 조회할 필요도 없음)"""
+    game_name, tag_line = (game_name or "").strip(), (tag_line or "").strip()
+    if not GAME_NAME_LENGTH[0] <= len(game_name) <= GAME_NAME_LENGTH[1]:
+        return False
+    if not TAG_LINE_LENGTH[0] <= len(tag_line) <= TAG_LINE_LENGTH[1]:
+        return False
+    if not tag_line.isalnum():
+        return False
+    return all(c.isprintable() and c not in FORBIDDEN_CHARS for c in game_name)
+
+
+def split_riot_id(name: str) -> Optional[Tuple[str, str]]:
+    """'이름#태그'를 (이름, 태그)로 나눔 (형식이 틀리면 None)"""
+    game_name, sep, tag_line = name.partition("#")
+    if not sep:
+        return None
+    game_name, tag_line = game_name.strip(), tag_line.strip()
+    if not is_valid_riot_id(game_name, tag_line):
+        return None
+    return game_name, tag_line
@@ -0,0 +1,207 @@
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional, Tuple
+
+# 지연 시간 히스토그램 버킷 상한(초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROLLING_WINDOW = 300   # 롤링 통계 구간(초)
+ROLLING_SLOT = 10      # 구간을 나누는 칸 크기(초)
+
+# 현재 라이엇 호출을 일으킨 기능 (밸런스, 플레이어 조회, 프락시 등)
+riot_feature: ContextVar[str] = ContextVar("riot_feature", default="other")
+
+
+@contextmanager
+def use_feature(name: str):
+    """with 블록 안의 라이엇 호출을 해당 기능 사용량으로 집계"""
+    token = riot_feature.set(name)
+    try:
+        yield
+    finally:
+        riot_feature.reset(token)
+
+
+def region_of(host: str) -> str:
+    """'kr.api.riotgames.com' -> 'kr' (가짜 서버 등은 호스트 그대로)"""
+    return host.split(".api.riotgames.com")[0]
+
+
+class RollingHistogram:
+    """최근 window초 동안의 값 분포 (slot초 단위 칸을 돌려 쓰므로 메모리 고정)"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS, window: int = ROLLING_WINDOW,
+                 slot: int = ROLLING_SLOT):
+        self.buckets = buckets
+        self.window = window
+        self.slot = slot
+        self._slots: Deque[list] = deque()  # [slot 시작, 버킷별 개수, 합계, 개수]
+
+    def observe(self, value: float, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        start = now - now % self.slot
+        if not self._slots or self._slots[-1][0] != start:
+            self._slots.append([start, [0] * (len(self.buckets) + 1), 0.0, 0])
+        current = self._slots[-1]
+        current[1][bisect_left(self.buckets, value)] += 1
+        current[2] += value
+        current[3] += 1
+        self._expire(now)
+
+    def _expire(self, now: float):
+        while self._slots and self._slots[0][0] <= now - self.window:
+            self._slots.popleft()
+
+    def _merged(self) -> Tuple[List[int], float, int]:
+        self._expire(time.time())
+        counts = [0] * (len(self.buckets) + 1)
+        total = count = 0
+        for _, slot_counts, slot_sum, slot_count in self._slots:
+            counts = [a + b for a, b in zip(counts, slot_counts)]
+            total += slot_sum
+            count += slot_count
+        return counts, total, count
+
+    def quantile(self, q: float, min_count: int = 1) -> Optional[float]:
+        """최근 구간 분위수(초), 표본이 min_count보다 적으면 None"""
+        counts, _, count = self._merged()
+        if count < max(min_count, 1):
+            return None
+        return self._quantile(counts, count, q) / 1000
+
+    def snapshot(self) -> Dict:
+        counts, total, count = self._merged()
+        return {
+            "count": count,
+            "avgMs": round(total / count * 1000, 1) if count else 0.0,
+            "p50Ms": self._quantile(counts, count, 0.5),
+            "p95Ms": self._quantile(counts, count, 0.95),
+            "p99Ms": self._quantile(counts, count, 0.99),
+            "buckets": {f"le_{b}": c for b, c in zip(self.buckets + ("inf",), counts)},
+        }
+
+    def _quantile(self, counts: List[int], count: int, q: float) -> Optional[float]:
+        # 버킷 상한으로 근사 (마지막 버킷이면 가장 큰 상한)
+        if not count:
+            return None
+        seen = 0
+        for bound, c in zip(self.buckets, counts):
+            seen += c
+            if seen >= q * count:
+                return bound * 1000
+        return self.buckets[-1] * 1000
+
+
+class RiotMetrics:
+    """라이엇 호출마다 라우트/지역/상태/지연/캐시/재시도/기능을 기록
+
+    JSON(/api/metrics/riot)에는 최근 구간(롤링) 통계를, Prometheus 텍스트에는 누적 카운터를 내보낸다.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        # (route, region) -> 롤링 지연 히스토그램
+        self._latency: Dict[Tuple[str, str], RollingHistogram] = {}
+        # 누적 카운터 (Prometheus용)
+        self._calls: Dict[Tuple[str, str, int, str], int] = {}      # (route, region, status, cache) -> 수
+        self._retries: Dict[Tuple[str, str], int] = {}               # (route, region) -> 재시도 수
+        self._latency_total: Dict[Tuple[str, str], List] = {}        # (route, region) -> [버킷별 개수, 합계, 개수]
+        self._features: Dict[Tuple[str, str], int] = {}              # (feature, cache) -> 수
+        # 최근 구간 기능별 업스트림 호출 (top callers)
+        self._recent_features: Deque[Tuple[float, str, str]] = deque()
+
+    def record(self, route: str, host: str, status: int, latency: float, cache: str, retries: int = 0,
+               feature: Optional[str] = None):
+        """cache: hit(응답 캐시) / negative(404 캐시) / shared(같은 요청 합류) / miss(업스트림 호출)
+        / stale(회로 차단 중 만료된 캐시) / open(회로 차단으로 바로 실패)"""
+        now = time.time()
+        region = region_of(host)
+        feature = feature or riot_feature.get()
+        key = (route, region)
+        self._calls[(route, region, status, cache)] = self._calls.get((route, region, status, cache), 0) + 1
+        self._features[(feature, cache)] = self._features.get((feature, cache), 0) + 1
+        if retries:
+            self._retries[key] = self._retries.get(key, 0) + retries
+        if cache == "miss":
+            self._latency.setdefault(key, RollingHistogram()).observe(latency, now)
+            total = self._latency_total.setdefault(key, [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0])
+            total[0][bisect_left(LATENCY_BUCKETS, latency)] += 1
+            total[1] += latency
+            total[2] += 1
+        self._recent_features.append((now, feature, cache))
+        while self._recent_features and self._recent_features[0][0] <= now - ROLLING_WINDOW:
+            self._recent_features.popleft()
+
+    def latency_quantile(self, route: str, host: str, q: float, min_count: int = 1) -> Optional[float]:
+        """라우트/지역의 최근 업스트림 지연 분위수(초)"""
+        hist = self._latency.get((route, region_of(host)))
+        return hist.quantile(q, min_count) if hist else None
+
+    def top_callers(self) -> List[Dict]:
+        """최근 구간 기능별 호출 수 (업스트림 호출이 많은 순)"""
+        by_feature: Dict[str, Dict[str, int]] = {}
+        for _, feature, cache in self._recent_features:
+            entry = by_feature.setdefault(feature, {"upstream": 0, "cached": 0})
+            entry["upstream" if cache == "miss" else "cached"] += 1
+        return [dict(feature=f, **c) for f, c in sorted(by_feature.items(), key=lambda kv: -kv[1]["upstream"])]
+
+    def snapshot(self, budget: Optional[Dict] = None) -> Dict:
+        routes = {}
+        for (route, region, status, cache), n in self._calls.items():
+            entry = routes.setdefault(f"{region}/{route}", {"route": route, "region": region, "status": {},
+                                                           "cache": {}, "retries": 0})
+            entry["status"][str(status)] = entry["status"].get(str(status), 0) + n
+            entry["cache"][cache] = entry["cache"].get(cache, 0) + n
+        for (route, region), n in self._retries.items():
+            routes[f"{region}/{route}"]["retries"] = n
+        for (route, region), hist in self._latency.items():
+            routes[f"{region}/{route}"]["latency"] = hist.snapshot()
+        return {
+            "windowSeconds": ROLLING_WINDOW,
+            "uptimeSeconds": round(time.time() - self.started),
+            "routes": routes,
+            "topCallers": self.top_callers(),
+            "budget": budget or {},
+        }
+
+    def prometheus(self, budget: Optional[Dict] = None) -> str:
+        """Prometheus 텍스트 노출 형식"""
+        def labels(**kv) -> str:
+            return "{" + ",".join(f'{k}="{str(v).replace(chr(34), "")}"' for k, v in kv.items()) + "}"
+
+        lines = ["# HELP riot_api_calls_total Riot API calls by route, region, status and cache result.",
+                 "# TYPE riot_api_calls_total counter"]
+        for (route, region, status, cache), n in sorted(self._calls.items()):
+            lines.append(f"riot_api_calls_total{labels(route=route, region=region, status=status, cache=cache)} {n}")
+        lines += ["# HELP riot_api_retries_total Retries after 429/5xx responses.",
+                  "# TYPE riot_api_retries_total counter"]
+        for (route, region), n in sorted(self._retries.items()):
+            lines.append(f"riot_api_retries_total{labels(route=route, region=region)} {n}")
+        lines += ["# HELP riot_api_latency_seconds Upstream Riot API latency.",
+                  "# TYPE riot_api_latency_seconds histogram"]
+        for (route, region), (counts, total, count) in sorted(self._latency_total.items()):
+            cumulative = 0
+            for bound, c in zip(LATENCY_BUCKETS + ("+Inf",), counts):
+                cumulative += c
+                lines.append(f"riot_api_latency_seconds_bucket{labels(route=route, region=region, le=bound)} {cumulative}")
+            lines.append(f"riot_api_latency_seconds_sum{labels(route=route, region=region)} {total:.6f}")
+            lines.append(f"riot_api_latency_seconds_count{labels(route=route, region=region)} {count}")
+        lines += ["# HELP riot_api_feature_calls_total Riot API calls by calling feature.",
+                  "# TYPE riot_api_feature_calls_total counter"]
+        for (feature, cache), n in sorted(self._features.items()):
+            lines.append(f"riot_api_feature_calls_total{labels(feature=feature, cache=cache)} {n}")
+        lines += ["# HELP riot_rate_limit_remaining Remaining requests in each rate limit window.",
+                  "# TYPE riot_rate_limit_remaining gauge"]
+        for host, scopes in (budget or {}).items():
+            for bucket in scopes.get("app", []):
+                lines.append(f"riot_rate_limit_remaining{labels(region=region_of(host), scope='app', method='', window=bucket['window'])} {bucket['remaining']}")
+            for method, buckets in scopes.get("methods", {}).items():
+                for bucket in buckets:
+                    lines.append(f"riot_rate_limit_remaining{labels(region=region_of(host), scope='method', method=method, window=bucket['window'])} {bucket['remaining']}")
+        return "\n".join(lines) + "\n"
+
+
+# 전역 인스턴스
+riot_metrics = RiotMetrics()
@@ -0,0 +1,169 @@
+import os
+import time
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+from .rate_limiter import RiotRateLimiter
+
+
+class PriorityClass(NamedTuple):
+    name: str
+    priority: int      # 작을수록 먼저
+    share: float       # 이 클래스가 기다리는 동안 보장받는 최소 호출 비율 (reserved share)
+    max_wait: float    # 이보다 오래 기다리면 우선순위와 관계없이 먼저 (starvation guard)
+
+
+PRIORITY_CLASSES: Dict[str, PriorityClass] = {
+    # 밸런스 페이지 등 사람이 기다리는 조회
+    "interactive": PriorityClass("interactive", 0, float(os.getenv("RIOT_INTERACTIVE_SHARE", "0.5")),
+                                 float(os.getenv("RIOT_INTERACTIVE_MAX_WAIT", "5"))),
+    # 프로필 갱신, 매치 기록 동기화 같은 일괄 작업
+    "background": PriorityClass("background", 1, float(os.getenv("RIOT_BACKGROUND_SHARE", "0.1")),
+                                float(os.getenv("RIOT_BACKGROUND_MAX_WAIT", "30"))),
+}
+# 남은 앱 한도가 이 비율 이하면 백그라운드 호출은 쉬고 대화형 호출 몫으로 남겨둠
+BACKGROUND_HEADROOM = float(os.getenv("RIOT_BACKGROUND_HEADROOM", "0.3"))
+# 남은 앱 한도가 이 비율 이하면 백그라운드 호출은 보장 비율/기아 방지와 관계없이 쓰지 않음 (대화형 예비분)
+INTERACTIVE_RESERVE = float(os.getenv("RIOT_INTERACTIVE_RESERVE", "0.1"))
+# 한도가 부족해 양보한 백그라운드 호출이 다시 줄을 서기까지 대기(초)
+BACKGROUND_POLL = 0.25
+# 호출 비율(share) 계산에 쓰는 최근 허가 수
+SHARE_WINDOW = 50
+
+# 현재 작업의 우선순위 클래스 (기본은 대화형)
+riot_priority: ContextVar[str] = ContextVar("riot_priority", default="interactive")
+
+
+@contextmanager
+def use_priority(name: str):
+    """with 블록 안의 라이엇 호출을 해당 우선순위 클래스로 보냄"""
+    if name not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class: {name}")
+    token = riot_priority.set(name)
+    try:
+        yield
+    finally:
+        riot_priority.reset(token)
+
+
+class _RouteQueue:
+    def __init__(self):
+        self.busy = False
+        self.waiting: Dict[str, Deque[Tuple[float, asyncio.Future]]] = {name: deque() for name in PRIORITY_CLASSES}
+
+
+class RiotScheduler:
+    """레이트 리미터 앞의 우선순위 큐
+
+    (호스트, 메서드)마다 한 번에 한 호출만 리미터 토큰을 기다리고, 다음 차례는
+    보장 비율에 못 미친 클래스 → 오래 굶은 클래스 → 우선순위 → 먼저 온 순서로 정한다.
+    메서드 한도는 따로이므로 느린 메서드가 같은 호스트의 다른 메서드를 막지 않는다.
+    백그라운드 호출은 남은 한도가 BACKGROUND_HEADROOM보다 많을 때만 쓰고,
+    앱 한도의 INTERACTIVE_RESERVE는 어떤 경우에도 대화형 호출 몫으로 남긴다.
+    """
+
+    def __init__(self, limiter: RiotRateLimiter, headroom: float = BACKGROUND_HEADROOM,
+                 reserve: float = INTERACTIVE_RESERVE):
+        self.limiter = limiter
+        self.headroom = headroom
+        self.reserve = reserve
+        self._queues: Dict[Tuple[str, str], _RouteQueue] = {}
+        self._granted: Deque[str] = deque(maxlen=SHARE_WINDOW)
+        self._waits: Dict[str, Deque[float]] = {name: deque(maxlen=500) for name in PRIORITY_CLASSES}
+        self._counts: Dict[str, int] = {name: 0 for name in PRIORITY_CLASSES}
+        self._pending: Dict[str, int] = {name: 0 for name in PRIORITY_CLASSES}  # 줄 서 있거나 양보 중인 호출
+        self.yielded = 0
+
+    def _share(self, name: str) -> float:
+        return self._granted.count(name) / len(self._granted) if self._granted else 0.0
+
+    def _pick(self, queue: _RouteQueue) -> Optional[Tuple[str, asyncio.Future]]:
+        now = time.monotonic()
+        for waiting in queue.waiting.values():
+            while waiting and waiting[0][1].done():  # 취소된 대기자 정리
+                waiting.popleft()
+        candidates = [name for name, waiting in queue.waiting.items() if waiting]
+        if not candidates:
+            return None
+
+        def rank(name: str):
+            cls, oldest = PRIORITY_CLASSES[name], queue.waiting[name][0][0]
+            below_share = self._share(name) < cls.share
+            starved = now - oldest > cls.max_wait
+            return (not below_share, not starved, cls.priority, oldest)
+
+        name = min(candidates, key=rank)
+        return name, queue.waiting[name].popleft()[1]
+
+    async def _enter(self, queue: _RouteQueue, name: str, enqueued: float):
+        if not queue.busy and not any(queue.waiting.values()):
+            queue.busy = True
+            return
+        future = asyncio.get_running_loop().create_future()
+        entry = (enqueued, future)
+        queue.waiting[name].append(entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._leave(queue)  # 차례를 받은 직후 취소되면 다음 대기자에게 넘김
+            elif entry in queue.waiting[name]:
+                queue.waiting[name].remove(entry)
+            raise
+
+    def _leave(self, queue: _RouteQueue):
+        picked = self._pick(queue)
+        if picked is None:
+            queue.busy = False
+        else:
+            picked[1].set_result(None)
+
+    def _may_spend(self, host: str, method: str, cls: PriorityClass, enqueued: float) -> bool:
+        if cls.priority == 0:
+            return True
+        if self.limiter.headroom(host) <= self.reserve:   # 앱 한도만 보고 판단
+            return False
+        if time.monotonic() - enqueued > cls.max_wait or self._share(cls.name) < cls.share:
+            return True
+        return self.limiter.headroom(host, method) > self.headroom
+
+    async def acquire(self, host: str, method: str, priority: Optional[str] = None):
+        """우선순위 차례가 오면 레이트 리미터 토큰 1개를 받음"""
+        cls = PRIORITY_CLASSES[priority or riot_priority.get()]
+        queue = self._queues.setdefault((host, method), _RouteQueue())
+        enqueued = time.monotonic()
+        self._pending[cls.name] += 1
+        try:
+            while True:
+                await self._enter(queue, cls.name, enqueued)
+                try:
+                    if self._may_spend(host, method, cls, enqueued):
+                        await self.limiter.acquire(host, method)
+                        self._granted.append(cls.name)
+                        self._counts[cls.name] += 1
+                        self._waits[cls.name].append(time.monotonic() - enqueued)
+                        return
+                finally:
+                    self._leave(queue)
+                # 남은 한도는 대화형 몫이므로 양보하고 잠시 뒤 다시 줄을 섬 (대기 시작 시각은 유지)
+                self.yielded += 1
+                await asyncio.sleep(BACKGROUND_POLL)
+        finally:
+            self._pending[cls.name] -= 1
+
+    def stats(self) -> Dict:
+        result = {}
+        for name in PRIORITY_CLASSES:
+            waits: List[float] = sorted(self._waits[name])
+            result[name] = {
+                "queued": self._pending[name],
+                "granted": self._counts[name],
+                "share": round(self._share(name), 2),
+                "avgWaitMs": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+                "p95WaitMs": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 1) if waits else 0.0,
+                "maxWaitMs": round(waits[-1] * 1000, 1) if waits else 0.0,
+            }
+        result["yielded"] = self.yielded
+        return result
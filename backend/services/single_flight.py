@@ -0,0 +1,56 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 요청은 첫 요청이 시작한 작업(task)의 결과를 함께 기다린다
+
+    작업은 호출한 쪽과 떨어진 task로 돌고 모두 shield로 기다리므로, 한 호출자가 취소되어도
+    다른 호출자에게 취소가 옮겨가지 않는다. 기다리는 호출자가 하나도 남지 않을 때만 작업을 취소한다.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, _Flight] = {}
+        self.calls = 0
+        self.deduplicated = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._inflight.get(key)
+        if flight is not None:
+            self.deduplicated += 1
+        else:
+            self.calls += 1
+            flight = self._inflight[key] = _Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(lambda task: self._done(key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _done(self, key: str, flight: _Flight):
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        # 아무도 기다리지 않았다면 "Task exception was never retrieved" 경고 방지
+        if not flight.task.cancelled():
+            flight.task.exception()
+
+    def inflight(self, key: str) -> bool:
+        """같은 키의 요청이 이미 진행 중인지"""
+        return key in self._inflight
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "deduplicated": self.deduplicated, "inflight": len(self._inflight)}
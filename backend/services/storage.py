@@ -0,0 +1,24 @@
+import os
+try:
+    import pysqlite3 as sqlite3
+except ImportError:
+    import sqlite3
+
+# Railway에서는 영구 볼륨(/data), 로컬에서는 backend 디렉토리에 보관
+DATA_DIR = os.getenv("LOLDABANG_DATA_DIR") or (
+    "/data" if os.path.isdir("/data") and os.access("/data", os.W_OK)
+    else os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+def data_path(filename: str) -> str:
+    """로컬 데이터 파일 경로"""
+    return os.path.join(DATA_DIR, filename)
+
+
+def connect(path: str) -> "sqlite3.Connection":
+    """여러 스레드에서 공유하는 sqlite 연결 (호출 측에서 락으로 보호)"""
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,60 @@
+"""Data Dragon champion.json으로 로컬 챔피언 인덱스(data/champion_index.json)를 만든다
+
+패치가 바뀌면 ddragon 압축본(dragontail-<버전>.tgz)이나 CDN에서 받은 파일로 오프라인에서 다시 생성한다.
+
+    python tools/build_champion_index.py --en dragontail/14.24.1/data/en_US/champion.json \\
+        --ko dragontail/14.24.1/data/ko_KR/champion.json
+    python tools/build_champion_index.py --version 14.24.1   # CDN에서 바로 받기 (네트워크 필요)
+
+결과는 챔피언 ID -> [key, name, ko_name, tags] 한 줄씩이라 패치 간 diff를 보기 쉽다.
+"""
+import os
+import json
+import argparse
+import urllib.request
+from typing import Dict, Optional
+
+DDRAGON_CDN = "https://ddragon.leagueoflegends.com/cdn"
+DEFAULT_OUTPUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "champion_index.json")
+
+
+def _load(path: Optional[str], version: Optional[str], locale: str) -> Dict:
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    if not version:
+        raise SystemExit(f"{locale} champion.json 경로나 --version이 필요합니다.")
+    with urllib.request.urlopen(f"{DDRAGON_CDN}/{version}/data/{locale}/champion.json", timeout=30) as r:
+        return json.load(r)
+
+
+def build_index(en: Dict, ko: Dict) -> Dict:
+    """두 언어의 champion.json을 챔피언 ID 기준으로 합침"""
+    if en.get("version") != ko.get("version"):
+        raise ValueError(f"버전이 다릅니다: en_US {en.get('version')} / ko_KR {ko.get('version')}")
+    ko_names = {c["key"]: c["name"] for c in ko["data"].values()}
+    champions = {}
+    for c in sorted(en["data"].values(), key=lambda c: int(c["key"])):
+        champions[c["key"]] = [c["id"], c["name"], ko_names.get(c["key"], c["name"]), c.get("tags", [])]
+    return {"version": en["version"], "champions": champions}
+
+
+def write_index(index: Dict, output: str):
+    # 챔피언 하나당 한 줄
+    lines = [f'    {json.dumps(k)}: {json.dumps(v, ensure_ascii=False)}' for k, v in index["champions"].items()]
+    with open(output, "w", encoding="utf-8") as f:
+        f.write('{\n  "version": ' + json.dumps(index["version"]) + ',\n  "champions": {\n')
+        f.write(",\n".join(lines))
+        f.write("\n  }\n}\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the local champion index from Data Dragon")
+    parser.add_argument("--en", help="en_US champion.json 경로")
+    parser.add_argument("--ko", help="ko_KR champion.json 경로")
+    parser.add_argument("--version", help="경로 대신 CDN에서 받을 패치 버전 (예: 14.24.1)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+    index = build_index(_load(args.en, args.version, "en_US"), _load(args.ko, args.version, "ko_KR"))
+    write_index(index, args.output)
+    print(f"{len(index['champions'])}개 챔피언 ({index['version']}) -> {args.output}")
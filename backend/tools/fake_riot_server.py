@@ -0,0 +1,270 @@
+"""로컬 라이엇 API 대역 서버 (부하 테스트 / CI용)
+
+실제 키를 쓰지 않고 RiotAPIService, services/riot_client, /api/riot/balance-5v5 전체 흐름을
+돌려볼 수 있도록 account-v1, summoner-v4, league-v4, champion-mastery-v4, match-v5 경로를 흉내낸다.
+
+    python tools/fake_riot_server.py --port 8900 --latency 0.05 --rate-429 0.02 --rate-5xx 0.01
+    RIOT_API_BASE_URL=http://127.0.0.1:8900 RIOT_API_KEY=fake python main.py
+
+응답은 --fixtures 디렉토리에 녹화된 JSON이 있으면 그것을, 없으면 Riot ID/PUUID에서
+결정적으로 만든 합성 데이터를 돌려준다. 녹화 파일 이름은 요청 경로의 '/'를 '__'로 바꾼 것이다.
+(예: lol__summoner__v4__summoners__by-puuid__<puuid>.json)
+"""
+import os
+import json
+import random
+import asyncio
+import hashlib
+import argparse
+from typing import Dict, List, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+import uvicorn
+
+app = FastAPI(title="Fake Riot API")
+
+CONFIG = {
+    "latency": float(os.getenv("FAKE_RIOT_LATENCY", "0.05")),    # 평균 지연(초)
+    "jitter": float(os.getenv("FAKE_RIOT_JITTER", "0.02")),      # 지연 편차(초)
+    "rate_429": float(os.getenv("FAKE_RIOT_RATE_429", "0")),     # 429 응답 비율
+    "retry_after": int(os.getenv("FAKE_RIOT_RETRY_AFTER", "1")), # 429의 Retry-After(초)
+    "rate_5xx": float(os.getenv("FAKE_RIOT_RATE_5XX", "0")),     # 5xx 응답 비율
+    "fixtures": os.getenv("FAKE_RIOT_FIXTURES", os.path.join(os.path.dirname(__file__), "fixtures")),
+    # 응답 헤더로 알려줄 한도 (개인 키 기본값, 부하 테스트 시 크게 설정)
+    "app_rate_limit": os.getenv("FAKE_RIOT_APP_RATE_LIMIT", "20:1,100:120"),
+    "method_rate_limit": os.getenv("FAKE_RIOT_METHOD_RATE_LIMIT", "2000:10"),
+}
+STATS = {"requests": 0, "429": 0, "5xx": 0, "fixtures": 0}
+
+TIERS = ["IRON", "BRONZE", "SILVER", "GOLD", "PLATINUM", "EMERALD", "DIAMOND", "MASTER"]
+DIVISIONS = ["IV", "III", "II", "I"]
+POSITIONS = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+
+# ids-by-puuid로 내준 매치 ID -> 그 매치에 반드시 들어가야 하는 PUUID
+_match_owner: Dict[str, str] = {}
+
+
+def _seed(*parts: str) -> int:
+    return int(hashlib.sha1("|".join(parts).encode()).hexdigest()[:12], 16)
+
+
+def _puuid(game_name: str, tag_line: str) -> str:
+    return f"fake-puuid-{_seed(game_name.lower(), tag_line.lower()):015x}"
+
+
+def _fixture(path: str) -> Optional[object]:
+    name = path.strip("/").replace("/", "__") + ".json"
+    fixture_path = os.path.join(CONFIG["fixtures"], name)
+    if os.path.exists(fixture_path):
+        STATS["fixtures"] += 1
+        with open(fixture_path, encoding="utf-8") as f:
+            return json.load(f)
+    return None
+
+
+@app.middleware("http")
+async def inject_latency_and_errors(request: Request, call_next):
+    if request.url.path.startswith("/_fake"):
+        return await call_next(request)
+    STATS["requests"] += 1
+    await asyncio.sleep(max(0.0, random.gauss(CONFIG["latency"], CONFIG["jitter"])))
+    headers = {"X-App-Rate-Limit": CONFIG["app_rate_limit"], "X-Method-Rate-Limit": CONFIG["method_rate_limit"]}
+    roll = random.random()
+    if roll < CONFIG["rate_429"]:
+        STATS["429"] += 1
+        headers["Retry-After"] = str(CONFIG["retry_after"])
+        headers["X-Rate-Limit-Type"] = "application"
+        return JSONResponse({"status": {"message": "Rate limit exceeded", "status_code": 429}}, 429, headers=headers)
+    if roll < CONFIG["rate_429"] + CONFIG["rate_5xx"]:
+        STATS["5xx"] += 1
+        return JSONResponse({"status": {"message": "Service unavailable", "status_code": 503}}, 503, headers=headers)
+
+    fixture = _fixture(request.url.path)
+    if fixture is not None:
+        return JSONResponse(fixture, headers=headers)
+    response = await call_next(request)
+    for k, v in headers.items():
+        response.headers[k] = v
+    return response
+
+
+def _not_found(message: str = "Data not found"):
+    return JSONResponse({"status": {"message": message, "status_code": 404}}, 404)
+
+
+# ===== account-v1 =====
+
+@app.get("/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}")
+async def account_by_riot_id(game_name: str, tag_line: str):
+    # 'unknown'으로 시작하는 이름은 존재하지 않는 계정으로 취급 (404 테스트용)
+    if game_name.lower().startswith("unknown"):
+        return _not_found()
+    return {"puuid": _puuid(game_name, tag_line), "gameName": game_name, "tagLine": tag_line}
+
+
+@app.get("/riot/account/v1/accounts/by-puuid/{puuid}")
+async def account_by_puuid(puuid: str):
+    return {"puuid": puuid, "gameName": f"Fake{_seed(puuid) % 10000}", "tagLine": "KR1"}
+
+
+# ===== summoner-v4 =====
+
+@app.get("/lol/summoner/v4/summoners/by-puuid/{puuid}")
+async def summoner_by_puuid(puuid: str):
+    seed = _seed(puuid)
+    return {
+        "id": f"fake-summoner-{seed:015x}",
+        "puuid": puuid,
+        "profileIconId": seed % 5000,
+        "revisionDate": 1700000000000,
+        "summonerLevel": 30 + seed % 500,
+    }
+
+
+# ===== league-v4 =====
+
+def _league_entries(puuid: str, summoner_id: Optional[str] = None) -> List[Dict]:
+    seed = _seed(puuid)
+    tier = TIERS[seed % len(TIERS)]
+    wins, losses = 20 + seed % 150, 20 + (seed >> 8) % 150
+    entry = {
+        "leagueId": f"fake-league-{seed % 1000}",
+        "queueType": "RANKED_SOLO_5x5",
+        "tier": tier,
+        "rank": "I" if tier == "MASTER" else DIVISIONS[(seed >> 4) % 4],
+        "leaguePoints": (seed >> 12) % 100,
+        "wins": wins,
+        "losses": losses,
+        "veteran": False,
+        "inactive": False,
+        "freshBlood": False,
+        "hotStreak": bool(seed % 2),
+        "puuid": puuid,
+    }
+    if summoner_id:
+        entry["summonerId"] = summoner_id
+    return [entry]
+
+
+@app.get("/lol/league/v4/entries/by-summoner/{summoner_id}")
+async def league_by_summoner(summoner_id: str):
+    # 합성 소환사 ID에는 PUUID 시드가 들어있지 않으므로 소환사 ID 자체를 시드로 사용
+    return _league_entries(summoner_id, summoner_id)
+
+
+@app.get("/lol/league/v4/entries/by-puuid/{puuid}")
+async def league_by_puuid(puuid: str):
+    return _league_entries(puuid)
+
+
+# ===== champion-mastery-v4 =====
+
+def _masteries(key: str, puuid: str) -> List[Dict]:
+    rng = random.Random(_seed(key))
+    champions = rng.sample(range(1, 160), 20)
+    points = sorted((rng.randint(1000, 500000) for _ in champions), reverse=True)
+    return [
+        {"puuid": puuid, "championId": c, "championLevel": min(7, 1 + p // 30000), "championPoints": p,
+         "lastPlayTime": 1700000000000}
+        for c, p in zip(champions, points)
+    ]
+
+
+@app.get("/lol/champion-mastery/v4/champion-masteries/by-summoner/{summoner_id}")
+async def mastery_by_summoner(summoner_id: str):
+    return _masteries(summoner_id, "")
+
+
+@app.get("/lol/champion-mastery/v4/champion-masteries/by-puuid/{puuid}")
+async def mastery_by_puuid(puuid: str):
+    return _masteries(puuid, puuid)
+
+
+# ===== match-v5 =====
+
+MATCH_INTERVAL_MS = 40 * 60 * 1000
+LATEST_MATCH_MS = 1760000000000
+
+
+@app.get("/lol/match/v5/matches/by-puuid/{puuid}/ids")
+async def match_ids(puuid: str, start: int = 0, count: int = 20, startTime: Optional[int] = None):
+    seed = _seed(puuid)
+    ids = []
+    for i in range(start, start + min(count, 100)):
+        end_ms = LATEST_MATCH_MS - i * MATCH_INTERVAL_MS - (seed % 1000) * 1000
+        if startTime is not None and end_ms // 1000 < startTime:
+            break
+        match_id = f"KR_{end_ms // 1000}{seed % 1000:03d}"
+        _match_owner[match_id] = puuid
+        ids.append(match_id)
+    return ids
+
+
+@app.get("/lol/match/v5/matches/{match_id}")
+async def match_detail(match_id: str):
+    rng = random.Random(_seed(match_id))
+    owner = _match_owner.get(match_id)
+    puuids = [f"fake-puuid-{rng.getrandbits(60):015x}" for _ in range(10)]
+    if owner:
+        puuids[rng.randrange(10)] = owner
+    digits = match_id.split("_")[-1]
+    end_ms = int(digits[:-3]) * 1000 if digits[:-3].isdigit() else LATEST_MATCH_MS
+    blue_win = rng.random() < 0.5
+    participants = []
+    for i, puuid in enumerate(puuids):
+        team_id = 100 if i < 5 else 200
+        participants.append({
+            "puuid": puuid,
+            "participantId": i + 1,
+            "teamId": team_id,
+            "win": blue_win if team_id == 100 else not blue_win,
+            "championId": rng.randint(1, 160),
+            "championName": f"Champion{rng.randint(1, 160)}",
+            "teamPosition": POSITIONS[i % 5],
+            "kills": rng.randint(0, 15), "deaths": rng.randint(0, 12), "assists": rng.randint(0, 20),
+        })
+    return {
+        "metadata": {"matchId": match_id, "participants": puuids},
+        "info": {
+            "queueId": rng.choice([420, 420, 420, 440, 450]),
+            "gameCreation": end_ms - 30 * 60 * 1000,
+            "gameEndTimestamp": end_ms,
+            "gameDuration": 1800,
+            "participants": participants,
+        },
+    }
+
+
+# ===== 가짜 서버 제어 =====
+
+@app.get("/_fake/config")
+async def get_config():
+    return {"config": CONFIG, "stats": STATS}
+
+
+@app.post("/_fake/config")
+async def update_config(update: dict):
+    """실행 중에 지연/에러 주입 비율 변경"""
+    for key, value in update.items():
+        if key in CONFIG:
+            CONFIG[key] = type(CONFIG[key])(value)
+    return {"config": CONFIG}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Riot API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=CONFIG["latency"])
+    parser.add_argument("--jitter", type=float, default=CONFIG["jitter"])
+    parser.add_argument("--rate-429", type=float, default=CONFIG["rate_429"])
+    parser.add_argument("--retry-after", type=int, default=CONFIG["retry_after"])
+    parser.add_argument("--rate-5xx", type=float, default=CONFIG["rate_5xx"])
+    parser.add_argument("--fixtures", default=CONFIG["fixtures"])
+    parser.add_argument("--app-rate-limit", default=CONFIG["app_rate_limit"])
+    parser.add_argument("--method-rate-limit", default=CONFIG["method_rate_limit"])
+    args = parser.parse_args()
+    CONFIG.update(latency=args.latency, jitter=args.jitter, rate_429=args.rate_429,
+                  retry_after=args.retry_after, rate_5xx=args.rate_5xx, fixtures=args.fixtures,
+                  app_rate_limit=args.app_rate_limit, method_rate_limit=args.method_rate_limit)
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -10,3 +10,40 @@ export async function fetchRiotBalance(payload: {
   if (!res.ok) throw new Error(`API Error ${res.status}`);
   return await res.json();
 }
+
+export type RiotPlayerBatchItem = {
+  index: number;
+  gameName: string;
+  tagLine: string;
+  success: boolean;
+  data?: any;
+  message?: string;
+};
+
+// 여러 라이엇 ID를 한 번의 요청으로 조회하고, 도착하는 순서대로 onPlayer 호출
+export async function streamRiotPlayers(
+  players: { gameName: string; tagLine: string }[],
+  onPlayer: (item: RiotPlayerBatchItem) => void,
+) {
+  const res = await fetch(`${import.meta.env.VITE_API_BASE || ""}/api/riot/players/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ players }),
+  });
+  if (!res.ok || !res.body) throw new Error(`API Error ${res.status}`);
+
+  const reader = res.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = "";
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split("\n");
+    buffer = lines.pop() ?? "";
+    for (const line of lines) {
+      if (line.trim()) onPlayer(JSON.parse(line));
+    }
+  }
+  if (buffer.trim()) onPlayer(JSON.parse(buffer));
+}
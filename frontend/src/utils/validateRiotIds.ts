@@ -7,25 +7,25 @@ export type ValidateResult =
   { ok: true; gameName: string; tagLine: string; puuid: string } |
   { ok: false; gameName: string; tagLine: string; reason: string };
 
-export async function validateRiotIds(ids: {gameName:string; tagLine:string}[]): Promise<ValidateResult[]> {
-  const results: ValidateResult[] = [];
-  for (const id of ids) {
-    try {
-      const url = `${import.meta.env.VITE_API_BASE || ""}/api/riot/account/by-riot-id?gameName=${encodeURIComponent(id.gameName)}&tagLine=${encodeURIComponent(id.tagLine)}`;
-      const r = await fetch(url);
-      if (!r.ok) {
-        results.push({ ok:false, gameName:id.gameName, tagLine:id.tagLine, reason:`HTTP ${r.status}` });
-        continue;
-      }
-      const data = await r.json(); // { puuid, gameName, tagLine } 형태라고 가정
-      if (data?.puuid) {
-        results.push({ ok:true, gameName:data.gameName || id.gameName, tagLine:data.tagLine || id.tagLine, puuid:data.puuid });
-      } else {
-        results.push({ ok:false, gameName:id.gameName, tagLine:id.tagLine, reason:"invalid" });
-      }
-    } catch (e:any) {
-      results.push({ ok:false, gameName:id.gameName, tagLine:id.tagLine, reason:e?.message || "network error" });
+async function validateOne(id: {gameName:string; tagLine:string}): Promise<ValidateResult> {
+  try {
+    const url = `${import.meta.env.VITE_API_BASE || ""}/api/riot/account/by-riot-id?gameName=${encodeURIComponent(id.gameName)}&tagLine=${encodeURIComponent(id.tagLine)}`;
+    // 서버가 ETag/Cache-Control을 주므로 다시 검증할 때는 브라우저가 If-None-Match로 304를 받아 재사용
+    const r = await fetch(url);
+    if (!r.ok) {
+      return { ok:false, gameName:id.gameName, tagLine:id.tagLine, reason:`HTTP ${r.status}` };
+    }
+    const data = await r.json(); // { puuid, gameName, tagLine } 형태라고 가정
+    if (data?.puuid) {
+      return { ok:true, gameName:data.gameName || id.gameName, tagLine:data.tagLine || id.tagLine, puuid:data.puuid };
     }
+    return { ok:false, gameName:id.gameName, tagLine:id.tagLine, reason:"invalid" };
+  } catch (e:any) {
+    return { ok:false, gameName:id.gameName, tagLine:id.tagLine, reason:e?.message || "network error" };
   }
-  return results;
+}
+
+export async function validateRiotIds(ids: {gameName:string; tagLine:string}[]): Promise<ValidateResult[]> {
+  // 서버가 레이트 리밋과 캐시를 처리하므로 목록 전체를 동시에 요청
+  return Promise.all(ids.map(validateOne));
 }